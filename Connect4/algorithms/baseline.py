@@ -1,25 +1,15 @@
 import random
 
 def undo_move(game, col):
-    for row in range(game.rows):
-        if game.board[row][col] != ' ':
-            game.board[row][col] = ' '
-            game.current_winner = None
-            break
+    game.undo_move(col)
 
 def baseline_move_connect4(game, letter):
-    for move in game.available_moves():
-        game.make_move(move, letter)
-        if game.current_winner == letter:
-            undo_move(game, move)
-            return move
-        undo_move(game, move)
+    wins = game.winning_moves(letter)
+    if wins:
+        return wins[0]
 
     opponent = 'O' if letter == 'X' else 'X'
-    for move in game.available_moves():
-        game.make_move(move, opponent)
-        if game.current_winner == opponent:
-            undo_move(game, move)
-            return move
-        undo_move(game, move)
+    blocks = game.winning_moves(opponent)
+    if blocks:
+        return blocks[0]
     return random.choice(game.available_moves())
\ No newline at end of file
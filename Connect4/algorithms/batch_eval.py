@@ -0,0 +1,87 @@
+import numpy as np
+
+from geometry import board_geometry, line_scores, SHAPING_CENTER_BONUS
+from algorithms.qlearning import evaluate_window
+
+CELL_VALUES = {' ': 0, 'X': 1, 'O': -1}
+DIGIT_LETTERS = (' ', 'X', 'O')
+WINDOW_LENGTH = 4
+
+_window_indices = {}
+_pattern_tables = {}
+
+def window_index(rows, cols, k=WINDOW_LENGTH):
+    index = _window_indices.get((rows, cols, k))
+    if index is None:
+        index = np.array(board_geometry(rows, cols, k).lines, dtype=np.intp).reshape(-1, k)
+        _window_indices[(rows, cols, k)] = index
+    return index
+
+def pattern_digits(k=WINDOW_LENGTH):
+    codes = np.arange(3 ** k)
+    return np.stack([(codes // 3 ** i) % 3 for i in range(k)], axis=1)
+
+def minimax_pattern_table(k=WINDOW_LENGTH):
+    table = _pattern_tables.get(("minimax", k))
+    if table is None:
+        scores = line_scores(k)
+        table = np.zeros(3 ** k, dtype=np.int32)
+        for code, digits in enumerate(pattern_digits(k)):
+            x_count = int((digits == 1).sum())
+            o_count = int((digits == 2).sum())
+            if digits[0] == 1 and o_count == 0:
+                table[code] = scores[x_count]
+            elif digits[0] == 2 and x_count == 0:
+                table[code] = -scores[o_count]
+        _pattern_tables[("minimax", k)] = table
+    return table
+
+def qlearning_pattern_table(player, k=WINDOW_LENGTH):
+    table = _pattern_tables.get(("qlearning", player, k))
+    if table is None:
+        table = np.zeros(3 ** k, dtype=np.int32)
+        for code, digits in enumerate(pattern_digits(k)):
+            table[code] = evaluate_window([DIGIT_LETTERS[d] for d in digits], player)
+        _pattern_tables[("qlearning", player, k)] = table
+    return table
+
+def board_array(game):
+    return np.array([[CELL_VALUES[cell] for cell in row] for row in game.board], dtype=np.int8)
+
+def boards_array(games):
+    return np.stack([board_array(game) for game in games])
+
+def window_codes(boards, k=WINDOW_LENGTH):
+    boards = np.asarray(boards, dtype=np.int8)
+    n, rows, cols = boards.shape
+    digits = np.ascontiguousarray((boards.reshape(n, rows * cols) % 3).astype(np.int32).T)
+    index = window_index(rows, cols, k)
+    codes = digits[index[:, 0]]
+    for i in range(1, k):
+        codes += 3 ** i * digits[index[:, i]]
+    return codes
+
+def evaluate_boards(boards, player='X', k=WINDOW_LENGTH):
+    scores = minimax_pattern_table(k)[window_codes(boards, k)].sum(axis=0)
+    return scores if player == 'X' else -scores
+
+def evaluate_boards_qlearning(boards, player, k=WINDOW_LENGTH):
+    boards = np.asarray(boards, dtype=np.int8)
+    scores = qlearning_pattern_table(player, k)[window_codes(boards, k)].sum(axis=0)
+    center = boards[:, :, boards.shape[2] // 2]
+    return scores + (center == CELL_VALUES[player]).sum(axis=1) * SHAPING_CENTER_BONUS
+
+def child_boards(game, player):
+    board = board_array(game)
+    moves = game.available_moves()
+    children = np.repeat(board[np.newaxis], len(moves), axis=0)
+    for i, col in enumerate(moves):
+        empty_rows = np.flatnonzero(board[:, col] == 0)
+        children[i, empty_rows[-1], col] = CELL_VALUES[player]
+    return moves, children
+
+def score_moves(game, player, evaluator=evaluate_boards_qlearning):
+    moves, children = child_boards(game, player)
+    if not moves:
+        return {}
+    return dict(zip(moves, evaluator(children, player, game.k).tolist()))
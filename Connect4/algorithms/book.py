@@ -0,0 +1,169 @@
+import argparse
+import os
+import struct
+import time
+
+import numpy as np
+
+from game import BitboardConnect4, game_from_board
+from algorithms import minimax
+from algorithms.ordering import MoveOrderer
+from algorithms.transposition import TranspositionTable
+
+BOOK_MAGIC = b"C4BOOK\0\0"
+BOOK_VERSION = 2
+# magic, version, rows, cols, k, ply, depth, reserved, record count
+BOOK_HEADER = struct.Struct("<8sIBBBBB7xQ")
+# version 1 books had no k field and were always built for k=4
+BOOK_HEADER_V1 = struct.Struct("<8sIBBBBQ")
+DEFAULT_BOOK_PATH = "connect4_book.bin"
+
+_open_books = {}
+
+def position_code(game, player):
+    if not hasattr(game, "masks"):
+        game = game_from_board(game.board)
+    stones = game.masks[player]
+    return ((stones + game.occupied_mask() + game.bottom_mask) << 1) | (player == 'O')
+
+def mirror_code(code, rows, cols):
+    stride = rows + 1
+    column_mask = (1 << stride) - 1
+    position = code >> 1
+    mirrored = 0
+    for col in range(cols):
+        mirrored |= ((position >> (col * stride)) & column_mask) << ((cols - 1 - col) * stride)
+    return (mirrored << 1) | (code & 1)
+
+def canonical_code(game, player):
+    code = position_code(game, player)
+    mirrored = mirror_code(code, game.rows, game.cols)
+    if mirrored < code:
+        return mirrored, True
+    return code, False
+
+class OpeningBook:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(BOOK_HEADER.size)
+        magic, version = struct.unpack_from("<8sI", header)
+        if magic != BOOK_MAGIC or version not in (1, BOOK_VERSION):
+            raise ValueError(f"{path} is not a version {BOOK_VERSION} Connect4 book")
+        if version == 1:
+            _, _, rows, cols, ply, depth, count = BOOK_HEADER_V1.unpack_from(header)
+            k = 4
+            offset = BOOK_HEADER_V1.size
+        else:
+            _, _, rows, cols, k, ply, depth, count = BOOK_HEADER.unpack(header)
+            offset = BOOK_HEADER.size
+        self.path = path
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.ply = ply
+        self.depth = depth
+        self.count = count
+        self.keys = np.memmap(path, dtype="<u8", mode="r", offset=offset, shape=(count,)) if count else np.zeros(0, "<u8")
+        offset += 8 * count
+        self.scores = np.memmap(path, dtype="<i4", mode="r", offset=offset, shape=(count,)) if count else np.zeros(0, "<i4")
+        offset += 4 * count
+        self.moves = np.memmap(path, dtype="i1", mode="r", offset=offset, shape=(count,)) if count else np.zeros(0, "i1")
+
+    def __len__(self):
+        return self.count
+
+    def probe(self, game, player):
+        if game.rows != self.rows or game.cols != self.cols or game.k != self.k:
+            return None
+        code, mirrored = canonical_code(game, player)
+        index = int(np.searchsorted(self.keys, code))
+        if index >= self.count or int(self.keys[index]) != code:
+            return None
+        move = int(self.moves[index])
+        if mirrored:
+            move = self.cols - 1 - move
+        return {"position": move, "score": int(self.scores[index])}
+
+def open_book(path=DEFAULT_BOOK_PATH):
+    if path not in _open_books:
+        _open_books[path] = OpeningBook(path) if os.path.exists(path) else None
+    return _open_books[path]
+
+def book_move(game, player, path=DEFAULT_BOOK_PATH):
+    book = open_book(path)
+    if book is None:
+        return None
+    entry = book.probe(game, player)
+    return None if entry is None else entry["position"]
+
+def enumerate_positions(ply, rows=6, cols=7, k=4):
+    seen = set()
+    positions = []
+    frontier = []
+    for first_player in ('X', 'O'):
+        frontier.append(([], first_player))
+    for _ in range(ply + 1):
+        next_frontier = []
+        for moves, player in frontier:
+            game = BitboardConnect4(rows, cols, k)
+            mover = player
+            for move in moves:
+                game.make_move(move, mover)
+                mover = 'O' if mover == 'X' else 'X'
+            code, _ = canonical_code(game, mover)
+            if code in seen or game.current_winner is not None or not game.empty_squares():
+                continue
+            seen.add(code)
+            positions.append((moves, player))
+            for move in game.available_moves():
+                next_frontier.append((moves + [move], player))
+        frontier = next_frontier
+    return positions
+
+def build_book(path=DEFAULT_BOOK_PATH, ply=4, depth=8, rows=6, cols=7, k=4, tt_size_mb=64, verbose=True):
+    positions = enumerate_positions(ply, rows, cols, k)
+    tt = TranspositionTable(tt_size_mb)
+    records = {}
+    start = time.time()
+    for i, (moves, first_player) in enumerate(positions):
+        game = BitboardConnect4(rows, cols, k)
+        player = first_player
+        for move in moves:
+            game.make_move(move, player)
+            player = 'O' if player == 'X' else 'X'
+        result = minimax.iterative_deepening_connect4(game, player, max_depth=depth, time_budget_ms=float('inf'),
+                                                      ctx=minimax.SearchContext(tt, MoveOrderer(cols)))
+        code, mirrored = canonical_code(game, player)
+        move = result["position"]
+        records[code] = (int(result["score"]), cols - 1 - move if mirrored else move)
+        if verbose and (i + 1) % 100 == 0:
+            print(f"[INFO] {i + 1}/{len(positions)} book positions searched ({time.time() - start:.1f}s)")
+    write_book(path, records, rows, cols, k, ply, depth)
+    if verbose:
+        print(f"[INFO] Opening book with {len(records)} positions saved to {path}")
+    return len(records)
+
+def write_book(path, records, rows, cols, k, ply, depth):
+    keys = np.array(sorted(records), dtype="<u8")
+    scores = np.array([records[int(key)][0] for key in keys], dtype="<i4")
+    moves = np.array([records[int(key)][1] for key in keys], dtype="i1")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, rows, cols, k, ply, depth, len(keys)))
+        f.write(keys.tobytes())
+        f.write(scores.tobytes())
+        f.write(moves.tobytes())
+    os.replace(tmp_path, path)
+    _open_books.pop(path, None)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build a Connect4 opening book.")
+    parser.add_argument("--out", default=DEFAULT_BOOK_PATH)
+    parser.add_argument("--ply", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--tt-size-mb", type=int, default=64)
+    args = parser.parse_args()
+    build_book(args.out, args.ply, args.depth, args.rows, args.cols, args.k, tt_size_mb=args.tt_size_mb)
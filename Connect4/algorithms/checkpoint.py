@@ -0,0 +1,119 @@
+import atexit
+import os
+import pickle
+import shutil
+import threading
+
+CHECKPOINT_INTERVAL_GAMES = 1000
+MAX_BACKUPS = 5
+BACKUP_EVERY = 10
+
+def pickle_snapshot(f, snapshot):
+    pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+class CheckpointWriter:
+    def __init__(self, path, interval_games=CHECKPOINT_INTERVAL_GAMES, max_backups=MAX_BACKUPS,
+                 backup_every=BACKUP_EVERY, delta=False, serializer=None):
+        self.path = path
+        self.serializer = serializer or pickle_snapshot
+        self.interval_games = interval_games
+        self.max_backups = max_backups
+        self.backup_every = backup_every
+        self.delta = delta
+        self.games = 0
+        self.saves = 0
+        self._mirror = {}
+        self._base = None
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def game_finished(self, snapshot, games=1):
+        previous = self.games
+        self.games += games
+        if self.interval_games and self.games // self.interval_games > previous // self.interval_games:
+            self.submit(snapshot())
+            return True
+        return False
+
+    def set_base(self, items):
+        with self._condition:
+            self._base = items
+            self._mirror = {}
+
+    def submit(self, snapshot):
+        with self._condition:
+            if self._closed:
+                return
+            if self.delta and self._pending is not None:
+                self._pending.update(snapshot)
+            else:
+                self._pending = snapshot
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                snapshot = self._pending
+                self._pending = None
+                base = self._base
+                self._base = None
+                self._busy = True
+            try:
+                if self.delta:
+                    if base is not None:
+                        self._mirror = dict(base())
+                    self._mirror.update(snapshot)
+                    snapshot = self._mirror
+                self._write(snapshot)
+            except Exception as e:
+                print(f"[WARN] Checkpoint to {self.path} failed: {e}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _write(self, snapshot):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            self.serializer(f, snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.saves += 1
+        print(f"[INFO] Q-table checkpoint saved to {self.path}")
+        if self.max_backups and self.backup_every and self.saves % self.backup_every == 0:
+            self._rotate_backups()
+
+    def backup_path(self, index):
+        root, ext = os.path.splitext(self.path)
+        return f"{root}_backup_{index}{ext}"
+
+    def _rotate_backups(self):
+        for index in range(self.max_backups - 1, 0, -1):
+            if os.path.exists(self.backup_path(index)):
+                os.replace(self.backup_path(index), self.backup_path(index + 1))
+        tmp_path = self.backup_path(1) + ".tmp"
+        shutil.copyfile(self.path, tmp_path)
+        os.replace(tmp_path, self.backup_path(1))
+
+    def flush(self):
+        with self._condition:
+            while self._pending is not None or self._busy:
+                self._condition.wait()
+
+    def close(self):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
@@ -0,0 +1,253 @@
+import argparse
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from game import BitboardConnect4
+
+GAME = BitboardConnect4
+GAME_NAME = "Connect4"
+BOARD_ROWS = 6
+BOARD_COLS = 7
+BOARD_K = 4
+RECORDS_MAGIC = b"C4GAMES\0"
+
+# the rest of this module is kept identical in the Connect4 and Tic-Tac-Toe trees
+RECORDS_VERSION = 1
+# magic, version, rows, cols, k, reserved
+RECORDS_HEADER = struct.Struct("<8sIHHHH")
+# kind, first, first letter, winner, move count, reserved, agent a, agent b, game index
+RECORD_HEADER = struct.Struct("<BBBBHHIII")
+RECORD_DTYPE = np.dtype([("kind", "u1"), ("first", "u1"), ("first_letter", "u1"), ("winner", "u1"),
+                         ("length", "<u2"), ("reserved", "<u2"), ("agent_a", "<u4"), ("agent_b", "<u4"),
+                         ("game", "<u4")])
+GAME_RECORD = 0
+AGENT_RECORD = 1
+DRAW = 2
+LETTERS = ('X', 'O')
+MAX_THINK_MICROS = np.iinfo(np.uint32).max
+FLUSH_BYTES = 1 << 20
+
+def agent_id(name):
+    return zlib.crc32(name.encode())
+
+def padded(size):
+    return (size + 3) & ~3
+
+def read_header(path):
+    with open(path, "rb") as f:
+        data = f.read(RECORDS_HEADER.size)
+    if len(data) < RECORDS_HEADER.size:
+        raise ValueError(f"{path} is too short to be a game record file")
+    magic, version, rows, cols, k, _ = RECORDS_HEADER.unpack(data)
+    if magic != RECORDS_MAGIC or version != RECORDS_VERSION:
+        raise ValueError(f"{path} is not a version {RECORDS_VERSION} game record file")
+    return rows, cols, k
+
+def walk_records(data):
+    end = len(data)
+    position = RECORDS_HEADER.size
+    while position + RECORD_HEADER.size <= end:
+        kind, _, _, _, length, _, key, _, _ = RECORD_HEADER.unpack_from(data, position)
+        body = RECORD_HEADER.size + padded(length if kind == AGENT_RECORD else 5 * length)
+        if position + body > end:
+            return
+        yield position, kind, length, key
+        position += body
+
+def complete_size(path):
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    size = RECORDS_HEADER.size
+    for position, kind, length, _ in walk_records(data):
+        size = position + RECORD_HEADER.size + padded(length if kind == AGENT_RECORD else 5 * length)
+    del data
+    return size
+
+class GameRecordWriter:
+    def __init__(self, path, rows=BOARD_ROWS, cols=BOARD_COLS, k=BOARD_K, flush_bytes=FLUSH_BYTES):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.games = 0
+        self._buffer = bytearray()
+        self._agents = set()
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        with self._locked():
+            size = os.fstat(self._fd).st_size
+            if size < RECORDS_HEADER.size:
+                os.ftruncate(self._fd, 0)
+                os.write(self._fd, RECORDS_HEADER.pack(RECORDS_MAGIC, RECORDS_VERSION, rows, cols, k, 0))
+            elif read_header(path) != (rows, cols, k):
+                os.close(self._fd)
+                raise ValueError(f"{path} holds games for a different board than {rows}x{cols} k={k}")
+            else:
+                complete = complete_size(path)
+                if complete < size:
+                    # a writer killed mid-record leaves a partial tail; drop it so new records start aligned
+                    os.ftruncate(self._fd, complete)
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _agent(self, name):
+        key = agent_id(name)
+        if name not in self._agents:
+            encoded = name.encode()
+            self._buffer += RECORD_HEADER.pack(AGENT_RECORD, 0, 0, 0, len(encoded), 0, key, 0, 0)
+            self._buffer += encoded.ljust(padded(len(encoded)), b"\0")
+            self._agents.add(name)
+        return key
+
+    def add_game(self, agent_a, agent_b, first, first_letter, winner, moves, times, game=0):
+        moves = np.asarray(moves, dtype=np.uint8)
+        micros = np.minimum(np.asarray(times, dtype=np.float64) * 1e6, MAX_THINK_MICROS).astype("<u4")
+        length = len(moves)
+        self._buffer += RECORD_HEADER.pack(GAME_RECORD, first, LETTERS.index(first_letter),
+                                           DRAW if winner is None else winner, length, 0,
+                                           self._agent(agent_a), self._agent(agent_b), game)
+        self._buffer += micros.tobytes()
+        self._buffer += moves.tobytes()
+        self._buffer += bytes(padded(5 * length) - 5 * length)
+        self.games += 1
+        if len(self._buffer) >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        view = memoryview(self._buffer)
+        with self._locked():
+            while view:
+                view = view[os.write(self._fd, view):]
+        self._buffer = bytearray()
+
+    def close(self):
+        if self._fd is not None:
+            self.flush()
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class GameRecords:
+    def __init__(self, path):
+        self.path = path
+        self.rows, self.cols, self.k = read_header(path)
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        self.agents = {}
+        offsets = []
+        data = self.data
+        end = len(data)
+        for position, kind, length, key in walk_records(data):
+            if kind == AGENT_RECORD:
+                start = position + RECORD_HEADER.size
+                self.agents[key] = bytes(data[start:start + length]).decode()
+            else:
+                offsets.append(position)
+        self.words = data[:end - end % 4].view("<u4")
+        self.offsets = np.array(offsets, dtype=np.int64)
+        header_bytes = data[self.offsets[:, np.newaxis] + np.arange(RECORD_HEADER.size)]
+        self.headers = np.ascontiguousarray(header_bytes).view(RECORD_DTYPE).ravel()
+        self.lengths = self.headers["length"].astype(np.int64)
+        self.time_starts = self.offsets + RECORD_HEADER.size
+        self.move_starts = self.time_starts + 4 * self.lengths
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.moves(i)
+
+    def moves(self, i):
+        start = self.move_starts[i]
+        return self.data[start:start + self.lengths[i]]
+
+    def think_times(self, i):
+        start = self.time_starts[i] // 4
+        return self.words[start:start + self.lengths[i]]
+
+    def agent_names(self, i):
+        return self.agents[int(self.headers["agent_a"][i])], self.agents[int(self.headers["agent_b"][i])]
+
+    def winner(self, i):
+        winner = int(self.headers["winner"][i])
+        return None if winner == DRAW else winner
+
+    def _gather(self, source, starts):
+        bounds = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(self.lengths, out=bounds[1:])
+        index = np.repeat(starts - bounds[:-1], self.lengths) + np.arange(bounds[-1])
+        return np.asarray(source[index]), bounds
+
+    def all_moves(self):
+        return self._gather(self.data, self.move_starts)
+
+    def all_think_times(self):
+        return self._gather(self.words, self.time_starts // 4)
+
+    def replay(self, i):
+        game = GAME(self.rows, self.cols, self.k)
+        letter = LETTERS[self.headers["first_letter"][i]]
+        for move in self.moves(i).tolist():
+            game.make_move(move, letter)
+            letter = 'O' if letter == 'X' else 'X'
+        return game
+
+def summarize(records):
+    headers = records.headers
+    stats = {"games": len(records), "agents": {}}
+    if not len(records):
+        return stats
+    moves, bounds = records.all_moves()
+    micros, _ = records.all_think_times()
+    stats["average_moves"] = float(records.lengths.mean())
+    stats["average_think_ms"] = float(micros.mean() / 1000) if len(micros) else 0.0
+    openings = moves[bounds[:-1][records.lengths > 0]]
+    stats["opening_moves"] = {int(move): int(count) for move, count in zip(*np.unique(openings, return_counts=True))}
+    for side, field in enumerate(("agent_a", "agent_b")):
+        for key in np.unique(headers[field]):
+            mine = headers[field] == key
+            row = stats["agents"].setdefault(records.agents[int(key)], {"games": 0, "wins": 0, "losses": 0, "draws": 0})
+            row["games"] += int(mine.sum())
+            row["wins"] += int((mine & (headers["winner"] == side)).sum())
+            row["losses"] += int((mine & (headers["winner"] == 1 - side)).sum())
+            row["draws"] += int((mine & (headers["winner"] == DRAW)).sum())
+    return stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=f"Summarize or replay a {GAME_NAME} game record file.")
+    parser.add_argument("path")
+    parser.add_argument("--replay", type=int, default=None, help="print the final board of this game")
+    args = parser.parse_args()
+    records = GameRecords(args.path)
+    if args.replay is not None:
+        agent_a, agent_b = records.agent_names(args.replay)
+        print(f"[INFO] Game {args.replay}: {agent_a} vs {agent_b}, moves {records.moves(args.replay).tolist()}")
+        records.replay(args.replay).print_board()
+    else:
+        stats = summarize(records)
+        print(f"[INFO] {stats['games']} games in {args.path}")
+        if stats["games"]:
+            print(f"[INFO] average moves={stats['average_moves']:.1f}  think time={stats['average_think_ms']:.3f} ms/move")
+            print(f"[INFO] opening moves: {stats['opening_moves']}")
+        for name, row in stats["agents"].items():
+            print(f"{name:>30}: {row['wins']}-{row['losses']}-{row['draws']} in {row['games']} games")
@@ -1,16 +1,110 @@
 import time
+from game import BitboardConnect4
 from algorithms.baseline import undo_move
+from algorithms.transposition import TranspositionTable, EXACT, LOWER, UPPER
+from algorithms.ordering import MoveOrderer
+from algorithms import solver
 
-node_count = 0
-states_explored = 0
 ALPHA = -float('inf')
 BETA = float('inf')
+TT_SIZE_MB = 32
+CHECK_EVERY = 1024
+ENDGAME_EMPTY_THRESHOLD = 16
+SOLVED_WIN_SCORE = 1000000
+# wins are scored SOLVED_WIN_SCORE - plies from the root; anything this close is a forced result
+MATE_THRESHOLD = SOLVED_WIN_SCORE - 1000
+SOLVER_K = 4
+MAX_PLAYER = 'O'
+
+default_context = None
+last_context = None
+
+class SearchTimeout(Exception):
+    pass
+
+class SearchContext:
+    def __init__(self, tt=None, orderer=None, check_every=CHECK_EVERY, endgame_threshold=ENDGAME_EMPTY_THRESHOLD):
+        self.tt = tt
+        self.orderer = orderer
+        self.check_every = check_every
+        self.endgame_threshold = endgame_threshold
+        self.deadline = None
+        self.reset()
+
+    def reset(self):
+        self.node_count = 0
+        self.leaf_count = 0
+        self.endgame_solves = 0
+        self.tt_cutoffs = 0
+        self.root_best = None
+        self.start_time = time.time()
+
+    def set_time_limit(self, start_time, time_limit):
+        self.deadline = None if start_time is None or time_limit is None else start_time + time_limit
+
+    def check_time(self):
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+
+    def stats(self):
+        stats = {
+            "nodes": self.node_count,
+            "leaves": self.leaf_count,
+            "endgame_solves": self.endgame_solves,
+            "tt_cutoffs": self.tt_cutoffs,
+            "elapsed": time.time() - self.start_time
+        }
+        if self.tt is not None:
+            stats["tt"] = self.tt.stats()
+        if self.orderer is not None:
+            stats["ordering"] = self.orderer.stats()
+        return stats
+
+def get_default_context():
+    global default_context
+    if default_context is None:
+        default_context = SearchContext(TranspositionTable(TT_SIZE_MB), MoveOrderer())
+    return default_context
+
+def empty_cells(game):
+    move_count = getattr(game, "move_count", None)
+    if move_count is None:
+        return sum(row.count(' ') for row in game.board)
+    return game.rows * game.cols - move_count
+
+def solve_endgame(game, player, ply=0):
+    result = solver.solve(game, player)
+    if result["result"] == "win":
+        return SOLVED_WIN_SCORE - ply - result["plies"], result["position"]
+    elif result["result"] == "loss":
+        return ply + result["plies"] - SOLVED_WIN_SCORE, result["position"]
+    return 0, result["position"]
+
+def score_to_tt(score, ply):
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+def score_from_tt(score, ply):
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
 
 def evaluate_board(game, player):
+    evaluator = getattr(game, "evaluator", None)
+    if evaluator is not None:
+        return evaluator.evaluate(player)
+    return evaluate_board_full(game, player)
+
+def evaluate_board_full(game, player):
     opponent = 'X' if player == 'O' else 'O'
     score = 0
     for row in range(game.rows):
-        for col in range(game.columns):
+        for col in range(game.cols):
             if game.board[row][col] == player:
                 score += evaluate_direction(game, row, col, 1, 0, player)
                 score += evaluate_direction(game, row, col, 0, 1, player)
@@ -25,107 +119,288 @@ def evaluate_board(game, player):
 
 def evaluate_direction(game, row, col, d_row, d_col, player):
     count = 0
-    for i in range(4):
+    for i in range(game.k):
         r, c = row + i * d_row, col + i * d_col
-        if 0 <= r < game.rows and 0 <= c < game.columns:
+        if 0 <= r < game.rows and 0 <= c < game.cols:
             if game.board[r][c] == player:
                 count += 1
             elif game.board[r][c] != ' ':
                 return 0
         else:
             return 0
-    if count == 4:
-        return 100
-    elif count == 3:
-        return 10
-    elif count == 2:
-        return 1
-    else:
-        return 0
-
-def minimax_connect4(game, player, depth, alpha=-float('inf'), beta=float('inf'), start_time=None, time_limit=1800):
-    global node_count, states_explored
-    node_count += 1
-    states_explored += 1
-    if start_time and (time.time() - start_time) > time_limit:
-        return {"position": None, "score": evaluate_board(game, player)}
-    max_player = 'O'
+    return game.geometry.line_scores[count]
+
+def negamax(ctx, game, player, depth, alpha=-float('inf'), beta=float('inf'), ply=0, pv=None):
+    ctx.node_count += 1
+    if ctx.deadline is not None and ctx.node_count % ctx.check_every == 0:
+        ctx.check_time()
     other_player = 'X' if player == 'O' else 'O'
     if game.current_winner == other_player:
-        return {"position": None, "score": (len(game.available_moves()) + 1) if other_player == max_player else -1 * (len(game.available_moves()) + 1)}
-    elif depth == 0 or not game.empty_squares():
-        return {"position": None, "score": evaluate_board(game, player)}
-    if player == max_player:
-        best = {"position": None, "score": -float('inf')}
-    else:
-        best = {"position": None, "score": float('inf')}
-    for move in game.available_moves():
+        return ply - SOLVED_WIN_SCORE, None
+    elif not game.empty_squares():
+        ctx.leaf_count += 1
+        return evaluate_board(game, player), None
+    elif game.k == SOLVER_K and empty_cells(game) < ctx.endgame_threshold:
+        ctx.endgame_solves += 1
+        return solve_endgame(game, player, ply)
+    elif depth == 0:
+        ctx.leaf_count += 1
+        return evaluate_board(game, player), None
+    moves = game.available_moves()
+    tt = ctx.tt
+    tt_move = None
+    if tt is not None:
+        key = game.position_key(player)
+        entry = tt.probe(key)
+        if entry is not None:
+            entry_depth, flag, score, tt_move = entry
+            score = score_from_tt(score, ply)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    ctx.tt_cutoffs += 1
+                    return score, tt_move
+                elif flag == LOWER:
+                    if score > alpha:
+                        alpha = score
+                elif score < beta:
+                    beta = score
+                if alpha >= beta:
+                    ctx.tt_cutoffs += 1
+                    return score, tt_move
+        alpha_orig, beta_orig = alpha, beta
+    pv_move = pv[ply] if pv is not None and ply < len(pv) else None
+    hash_move = pv_move if pv_move is not None else tt_move
+    orderer = ctx.orderer
+    if orderer is not None:
+        moves = orderer.order(moves, player, ply, hash_move)
+    elif hash_move is not None and hash_move in moves:
+        moves.remove(hash_move)
+        moves.insert(0, hash_move)
+    best_score = -float('inf')
+    best_move = None
+    for index, move in enumerate(moves):
         game.make_move(move, player)
-        sim_score = minimax_connect4(game, other_player, depth - 1, alpha, beta, start_time, time_limit)
-        undo_move(game, move)
-        sim_score["position"] = move
-        if player == max_player:
-            if sim_score["score"] > best["score"]:
-                best = sim_score
-            alpha = max(alpha, best["score"])
-        else:
-            if sim_score["score"] < best["score"]:
-                best = sim_score
-            beta = min(beta, best["score"])
-        if beta <= alpha:
+        try:
+            score = -negamax(ctx, game, other_player, depth - 1, -beta, -alpha, ply + 1,
+                             pv if move == pv_move else None)[0]
+        finally:
+            undo_move(game, move)
+        if score > best_score:
+            best_score = score
+            best_move = move
+            if ply == 0:
+                ctx.root_best = (score, move)
+            if score > alpha:
+                alpha = score
+        if alpha >= beta:
+            if orderer is not None:
+                orderer.record_cutoff(move, player, ply, depth, index)
             break
-    return best
-
-def minimax_no_ab_connect4(game, player, depth, start_time=None, time_limit=1800):
-    global node_count, states_explored
-    node_count += 1
-    states_explored += 1
-    if start_time and (time.time() - start_time) > time_limit:
-        return {"position": None, "score": evaluate_board(game, player)}
-    max_player = 'O'
+    if tt is not None:
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        tt.store(key, depth, flag, score_to_tt(best_score, ply), best_move)
+    return best_score, best_move
+
+def negamax_no_ab(ctx, game, player, depth, ply=0):
+    ctx.node_count += 1
+    if ctx.deadline is not None and ctx.node_count % ctx.check_every == 0:
+        ctx.check_time()
     other_player = 'X' if player == 'O' else 'O'
     if game.current_winner == other_player:
-        return {"position": None, "score": (len(game.available_moves()) + 1) if other_player == max_player else -1 * (len(game.available_moves()) + 1)}
+        return ply - SOLVED_WIN_SCORE, None
     elif depth == 0 or not game.empty_squares():
-        return {"position": None, "score": evaluate_board(game, player)}
-    if player == max_player:
-        best = {"position": None, "score": -float('inf')}
-    else:
-        best = {"position": None, "score": float('inf')}
+        ctx.leaf_count += 1
+        return evaluate_board(game, player), None
+    best_score = -float('inf')
+    best_move = None
     for move in game.available_moves():
         game.make_move(move, player)
-        sim_score = minimax_no_ab_connect4(game, other_player, depth - 1, start_time, time_limit)
-        undo_move(game, move)
-        sim_score["position"] = move
-        if player == max_player:
-            if sim_score["score"] > best["score"]:
-                best = sim_score
+        try:
+            score = -negamax_no_ab(ctx, game, other_player, depth - 1, ply + 1)[0]
+        finally:
+            undo_move(game, move)
+        if score > best_score:
+            best_score = score
+            best_move = move
+            if ply == 0:
+                ctx.root_best = (score, move)
+    return best_score, best_move
+
+def to_absolute(score, player):
+    return score if player == MAX_PLAYER else -score
+
+def static_move(game, player):
+    best_score = -float('inf')
+    best_move = None
+    for move in game.available_moves():
+        game.make_move(move, player)
+        try:
+            score = SOLVED_WIN_SCORE - 1 if game.current_winner == player else evaluate_board(game, player)
+        finally:
+            undo_move(game, move)
+        if score > best_score:
+            best_score = score
+            best_move = move
+    return best_score, best_move
+
+def timeout_move(ctx, game, player):
+    if ctx.root_best is not None:
+        return ctx.root_best
+    if ctx.tt is not None:
+        entry = ctx.tt.probe(game.position_key(player))
+        if entry is not None and entry[3] in game.available_moves():
+            return score_from_tt(entry[2], 0), entry[3]
+    return static_move(game, player)
+
+def _prepare_context(ctx, start_time, time_limit):
+    global last_context
+    if ctx is None:
+        ctx = SearchContext()
+    ctx.reset()
+    ctx.set_time_limit(start_time, time_limit)
+    last_context = ctx
+    return ctx
+
+def minimax_connect4(game, player, depth, alpha=-float('inf'), beta=float('inf'), start_time=None, time_limit=1800, ctx=None):
+    ctx = _prepare_context(ctx, start_time, time_limit)
+    try:
+        if player == MAX_PLAYER:
+            score, move = negamax(ctx, game, player, depth, alpha, beta)
         else:
-            if sim_score["score"] < best["score"]:
-                best = sim_score
-    return best
+            score, move = negamax(ctx, game, player, depth, -beta, -alpha)
+    except SearchTimeout:
+        score, move = timeout_move(ctx, game, player)
+    ctx.deadline = None
+    return {"position": move, "score": to_absolute(score, player)}
+
+def minimax_no_ab_connect4(game, player, depth, start_time=None, time_limit=1800, ctx=None):
+    ctx = _prepare_context(ctx, start_time, time_limit)
+    try:
+        score, move = negamax_no_ab(ctx, game, player, depth)
+    except SearchTimeout:
+        score, move = timeout_move(ctx, game, player)
+    ctx.deadline = None
+    return {"position": move, "score": to_absolute(score, player)}
 
-def minimax_connect4_with_tracking(game, player, depth, alpha=-float('inf'), beta=float('inf'), start_time=None, time_limit=1800):
+def principal_variation(game, player, depth, tt):
+    line = []
+    for _ in range(depth):
+        if game.current_winner is not None:
+            break
+        move = tt.best_move(game.position_key(player))
+        if move is None or move not in game.available_moves():
+            break
+        game.make_move(move, player)
+        line.append(move)
+        player = 'X' if player == 'O' else 'O'
+    for move in reversed(line):
+        undo_move(game, move)
+    return line
+
+def iterative_deepening_connect4(game, player, max_depth=None, time_budget_ms=1000, use_alpha_beta=True, ctx=None):
+    global last_context
+    if max_depth is None:
+        max_depth = empty_cells(game)
+    if ctx is None:
+        ctx = get_default_context()
+    if ctx.orderer is not None:
+        ctx.orderer.new_search()
+    ctx.reset()
+    last_context = ctx
+    start_time = ctx.start_time
+    time_limit = time_budget_ms / 1000.0
+    best_score = None
+    best_move = None
+    pv = []
+    completed_depth = 0
+    for depth in range(1, max_depth + 1):
+        ctx.set_time_limit(start_time if depth > 1 else None, time_limit)
+        try:
+            if use_alpha_beta:
+                score, move = negamax(ctx, game, player, depth, -float('inf'), float('inf'), 0, pv)
+            else:
+                score, move = negamax_no_ab(ctx, game, player, depth)
+        except SearchTimeout:
+            break
+        best_score, best_move = score, move
+        completed_depth = depth
+        pv = principal_variation(game, player, depth, ctx.tt) if use_alpha_beta and ctx.tt is not None else []
+        if not pv or pv[0] != move:
+            pv = [move]
+        if time.time() - start_time > time_limit:
+            break
+    ctx.deadline = None
+    return {
+        "position": best_move,
+        "score": to_absolute(best_score, player),
+        "depth": completed_depth,
+        "pv": pv,
+        "nodes": ctx.node_count,
+        "elapsed": time.time() - start_time
+    }
+
+def minimax_connect4_with_tracking(game, player, depth, alpha=-float('inf'), beta=float('inf'), start_time=None, time_limit=1800, ctx=None):
     use_alpha_beta = True
-    result = minimax_connect4(game, player, depth, alpha, beta, start_time, time_limit)
+    ctx = ctx or SearchContext()
+    result = minimax_connect4(game, player, depth, alpha, beta, start_time, time_limit, ctx)
     return {
         "position": result["position"],
         "score": result["score"],
         "use_alpha_beta": use_alpha_beta,
         "alpha": alpha,
-        "beta": beta
+        "beta": beta,
+        "states_explored": ctx.node_count,
+        "stats": ctx.stats()
     }
 
-def minimax_no_ab_connect4_with_tracking(game, player, depth, start_time=None, time_limit=1800):
+def minimax_no_ab_connect4_with_tracking(game, player, depth, start_time=None, time_limit=1800, ctx=None):
     use_alpha_beta = False
-    result = minimax_no_ab_connect4(game, player, depth, start_time, time_limit)
+    ctx = ctx or SearchContext()
+    result = minimax_no_ab_connect4(game, player, depth, start_time, time_limit, ctx)
     return {
         "position": result["position"],
         "score": result["score"],
         "use_alpha_beta": use_alpha_beta,
         "alpha": None,
-        "beta": None
+        "beta": None,
+        "states_explored": ctx.node_count,
+        "stats": ctx.stats()
     }
 
 def get_states_explored():
-    return states_explored
\ No newline at end of file
+    return last_context.node_count if last_context is not None else 0
+
+def get_tt_stats():
+    return get_default_context().tt.stats()
+
+def get_ordering_stats():
+    return get_default_context().orderer.stats()
+
+def new_game(cols=7):
+    ctx = get_default_context()
+    if ctx.orderer.cols != cols:
+        ctx.orderer = MoveOrderer(cols)
+    else:
+        ctx.orderer.new_game()
+
+def benchmark_board_sizes(sizes=((6, 7, 4), (7, 8, 4), (8, 9, 5), (9, 10, 5), (10, 11, 6)), depth=7):
+    results = []
+    for rows, cols, k in sizes:
+        game = BitboardConnect4(rows, cols, k)
+        ctx = SearchContext(TranspositionTable(TT_SIZE_MB), MoveOrderer(cols))
+        start = time.time()
+        negamax(ctx, game, 'X', depth)
+        elapsed = time.time() - start
+        nodes_per_second = ctx.node_count / elapsed if elapsed > 0 else 0.0
+        results.append({"rows": rows, "cols": cols, "k": k, "lines": len(game.geometry.lines),
+                        "nodes": ctx.node_count, "elapsed": elapsed, "nodes_per_second": nodes_per_second})
+        print(f"[INFO] {rows}x{cols} k={k}: {ctx.node_count} nodes in {elapsed:.2f}s ({nodes_per_second:.0f} nodes/s)")
+    return results
+
+if __name__ == '__main__':
+    benchmark_board_sizes()
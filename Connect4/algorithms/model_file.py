@@ -0,0 +1,148 @@
+import argparse
+import os
+import pickle
+import struct
+
+import numpy as np
+
+from algorithms.qtable import QTable, NO_ROW
+
+MODEL_MAGIC = b"C4QTAB\0\0"
+MODEL_VERSION = 1
+# magic, version, actions, record count
+MODEL_HEADER = struct.Struct("<8sIIQ")
+OVERLAY_CAPACITY = 1 << 12
+
+def is_model_file(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MODEL_MAGIC)) == MODEL_MAGIC
+    except OSError:
+        return False
+
+def write_model(f, snapshot):
+    keys, values, visits = snapshot
+    order = np.argsort(keys, kind="stable")
+    f.write(MODEL_HEADER.pack(MODEL_MAGIC, MODEL_VERSION, values.shape[1], len(keys)))
+    f.write(np.ascontiguousarray(keys[order], dtype="<u8").tobytes())
+    f.write(np.ascontiguousarray(values[order], dtype="<f4").tobytes())
+    f.write(np.ascontiguousarray(visits[order], dtype="<u4").tobytes())
+
+def save_model_file(table, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        write_model(f, table.snapshot())
+    os.replace(tmp_path, path)
+
+class MappedQTable(QTable):
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, actions, count = MODEL_HEADER.unpack(f.read(MODEL_HEADER.size))
+        if magic != MODEL_MAGIC or version != MODEL_VERSION:
+            raise ValueError(f"{path} is not a version {MODEL_VERSION} Connect4 Q-table")
+        self.path = path
+        self.base_size = count
+        offset = MODEL_HEADER.size
+        if count:
+            self.base_keys = np.memmap(path, dtype="<u8", mode="r", offset=offset, shape=(count,))
+            offset += 8 * count
+            self.base_values = np.memmap(path, dtype="<f4", mode="c", offset=offset, shape=(count, actions))
+            offset += 4 * actions * count
+            self.base_visits = np.memmap(path, dtype="<u4", mode="c", offset=offset, shape=(count,))
+        else:
+            self.base_keys = np.zeros(0, dtype="<u8")
+            self.base_values = np.zeros((0, actions), dtype="<f4")
+            self.base_visits = np.zeros(0, dtype="<u4")
+        super().__init__(actions, OVERLAY_CAPACITY)
+
+    def find(self, key):
+        row = QTable.find(self, key)
+        if row != NO_ROW:
+            return self.base_size + row
+        index = int(np.searchsorted(self.base_keys, np.uint64(key)))
+        if index < self.base_size and int(self.base_keys[index]) == key:
+            return index
+        return NO_ROW
+
+    def row_for(self, key):
+        row = self.find(key)
+        if row == NO_ROW:
+            row = self.base_size + QTable.row_for(self, key)
+        return row
+
+    def row_values(self, row):
+        if row < self.base_size:
+            return self.base_values[row]
+        return self.values[row - self.base_size]
+
+    def visit(self, key):
+        row = self.row_for(key)
+        if row < self.base_size:
+            self.base_visits[row] += 1
+        else:
+            self.visits[row - self.base_size] += 1
+        return row
+
+    def gather(self, rows):
+        values = np.empty((len(rows), self.actions), dtype=np.float32)
+        in_base = rows < self.base_size
+        values[in_base] = self.base_values[rows[in_base]]
+        values[~in_base] = self.values[rows[~in_base] - self.base_size]
+        return values
+
+    def scatter(self, rows, actions, values):
+        in_base = rows < self.base_size
+        self.base_values[rows[in_base], actions[in_base]] = values[in_base]
+        self.values[rows[~in_base] - self.base_size, actions[~in_base]] = values[~in_base]
+
+    def scatter_rows(self, rows, values):
+        in_base = rows < self.base_size
+        self.base_values[rows[in_base]] = values[in_base]
+        self.values[rows[~in_base] - self.base_size] = values[~in_base]
+
+    def gather_visits(self, rows):
+        visits = np.empty(len(rows), dtype=np.uint32)
+        in_base = rows < self.base_size
+        visits[in_base] = self.base_visits[rows[in_base]]
+        visits[~in_base] = self.visits[rows[~in_base] - self.base_size]
+        return visits
+
+    def scatter_visits(self, rows, visits):
+        in_base = rows < self.base_size
+        self.base_visits[rows[in_base]] = visits[in_base]
+        self.visits[rows[~in_base] - self.base_size] = visits[~in_base]
+
+    def __len__(self):
+        return self.base_size + self.size
+
+    def snapshot(self):
+        keys, values, visits = QTable.snapshot(self)
+        return (np.concatenate([self.base_keys, keys]), np.concatenate([self.base_values, values]),
+                np.concatenate([self.base_visits, visits]))
+
+    def __reduce__(self):
+        keys, values, visits = self.snapshot()
+        return (QTable.__new__, (QTable,), {"actions": self.actions, "values": values, "visits": visits, "row_keys": keys})
+
+def load_model_file(path):
+    return MappedQTable(path)
+
+def load_pickle_table(path):
+    with open(path, "rb") as f:
+        table = pickle.load(f)
+    if isinstance(table, dict):
+        table = QTable.from_dict(table)
+    return table
+
+def convert_pickle(pkl_path, out_path):
+    table = load_pickle_table(pkl_path)
+    save_model_file(table, out_path)
+    print(f"[INFO] Converted {pkl_path} ({len(table)} states) to {out_path}")
+    return len(table)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert a pickled Connect4 Q-table to the binary model format.")
+    parser.add_argument("pkl_path")
+    parser.add_argument("out_path")
+    args = parser.parse_args()
+    convert_pickle(args.pkl_path, args.out_path)
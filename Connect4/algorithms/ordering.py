@@ -0,0 +1,56 @@
+MAX_PLY = 64
+HASH_MOVE_SCORE = 1 << 30
+KILLER_SCORES = (1 << 29, 1 << 28)
+
+class MoveOrderer:
+    def __init__(self, cols=7, max_ply=MAX_PLY):
+        self.cols = cols
+        self.max_ply = max_ply
+        self.center_bonus = [cols - abs(2 * col - (cols - 1)) for col in range(cols)]
+        self.new_game()
+
+    def new_game(self):
+        self.history = {'X': [0] * self.cols, 'O': [0] * self.cols}
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.new_search()
+
+    def new_search(self):
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+
+    def order(self, moves, player, ply, hash_move=None):
+        history = self.history[player]
+        center_bonus = self.center_bonus
+        killers = self.killers[ply] if ply < self.max_ply else (None, None)
+
+        def score(move):
+            if move == hash_move:
+                return HASH_MOVE_SCORE
+            if move == killers[0]:
+                return KILLER_SCORES[0]
+            if move == killers[1]:
+                return KILLER_SCORES[1]
+            return history[move] * self.cols + center_bonus[move]
+
+        return sorted(moves, key=score, reverse=True)
+
+    def record_cutoff(self, move, player, ply, depth, move_index):
+        self.cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self.history[player][move] += depth * depth
+
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def stats(self):
+        return {
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoff_rate()
+        }
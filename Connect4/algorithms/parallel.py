@@ -0,0 +1,116 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game import BitboardConnect4, game_from_board
+from algorithms import minimax
+from algorithms.ordering import MoveOrderer
+from algorithms.transposition import SharedTranspositionTable
+
+SHARED_TT_SIZE_MB = 64
+BENCHMARK_OPENINGS = ([], [3, 3], [3, 2, 4], [3, 3, 3, 4, 2])
+
+_worker_tt = None
+
+def _init_worker(tt_name, tt_size_mb):
+    global _worker_tt
+    _worker_tt = SharedTranspositionTable(tt_size_mb, name=tt_name)
+
+def _search_root_move(board, player, move, depth):
+    game = game_from_board(board)
+    other_player = 'X' if player == 'O' else 'O'
+    _worker_tt.reset_stats()
+    ctx = minimax.SearchContext(_worker_tt, MoveOrderer(game.cols))
+    game.make_move(move, player)
+    score = -minimax.negamax(ctx, game, other_player, depth - 1, ply=1)[0]
+    return {
+        "move": move,
+        "score": score,
+        "nodes": ctx.node_count,
+        "seconds": time.time() - ctx.start_time,
+        "pid": os.getpid(),
+        "tt": _worker_tt.stats()
+    }
+
+def merge_worker_stats(reports):
+    merged = {"nodes": 0, "per_worker": {}, "tt": {}}
+    for report in reports:
+        merged["nodes"] += report["nodes"]
+        merged["per_worker"][report["pid"]] = merged["per_worker"].get(report["pid"], 0) + report["nodes"]
+        for key in ("probes", "hits", "stores", "collisions", "rejected"):
+            merged["tt"][key] = merged["tt"].get(key, 0) + report["tt"][key]
+    probes = merged["tt"].get("probes", 0)
+    merged["tt"]["hit_rate"] = merged["tt"]["hits"] / probes if probes else 0.0
+    return merged
+
+class ParallelSearcher:
+    def __init__(self, workers=None, tt_size_mb=SHARED_TT_SIZE_MB):
+        self.workers = workers or os.cpu_count() or 1
+        self.tt = SharedTranspositionTable(tt_size_mb)
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(self.tt.name, tt_size_mb))
+
+    def search(self, game, player, depth):
+        start = time.time()
+        root_moves = MoveOrderer(game.cols).order(game.available_moves(), player, 0)
+        board = [row[:] for row in game.board]
+        futures = [self.executor.submit(_search_root_move, board, player, move, depth) for move in root_moves]
+        reports = [future.result() for future in futures]
+        best = None
+        for report in reports:
+            if best is None or report["score"] > best["score"]:
+                best = report
+        stats = merge_worker_stats(reports)
+        return {
+            "position": best["move"],
+            "score": minimax.to_absolute(best["score"], player),
+            "depth": depth,
+            "nodes": stats["nodes"],
+            "workers": self.workers,
+            "elapsed": time.time() - start,
+            "stats": stats
+        }
+
+    def close(self):
+        self.executor.shutdown()
+        self.tt.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _benchmark_positions():
+    positions = []
+    for opening in BENCHMARK_OPENINGS:
+        game = BitboardConnect4()
+        player = 'X'
+        for move in opening:
+            game.make_move(move, player)
+            player = 'O' if player == 'X' else 'X'
+        positions.append((game, player))
+    return positions
+
+def benchmark(depth=7, worker_counts=None):
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n < cores] + [cores]
+    positions = _benchmark_positions()
+    results = []
+    for workers in worker_counts:
+        with ParallelSearcher(workers) as searcher:
+            start = time.time()
+            nodes = 0
+            for game, player in positions:
+                nodes += searcher.search(game, player, depth)["nodes"]
+            elapsed = time.time() - start
+        results.append({"workers": workers, "seconds": elapsed, "nodes": nodes, "nodes_per_second": nodes / elapsed})
+    for result in results:
+        result["speedup"] = results[0]["seconds"] / result["seconds"]
+        print(f"workers={result['workers']:>3}  time={result['seconds']:.2f}s  "
+              f"nodes={result['nodes']}  nps={result['nodes_per_second']:.0f}  speedup={result['speedup']:.2f}x")
+    return results
+
+if __name__ == '__main__':
+    benchmark()
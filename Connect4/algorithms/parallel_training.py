@@ -0,0 +1,204 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from game import BitboardConnect4
+from algorithms import qlearning, baseline, minimax
+from algorithms.qtable import QTable
+
+SYNC_EVERY_GAMES = 200
+OPPONENT_DEPTH = 2
+WIN_REWARD = 10
+DRAW_REWARD = 0
+
+def opponent_move(game, letter, opponent):
+    if opponent == "minimax":
+        return minimax.minimax_connect4(game, letter, OPPONENT_DEPTH)["position"]
+    return baseline.baseline_move_connect4(game, letter)
+
+def play_training_game(opponent):
+    game = BitboardConnect4()
+    q_letter = random.choice(('X', 'O'))
+    player = 'X'
+    while game.empty_squares():
+        if player == q_letter:
+            move = qlearning.q_learning_move_connect4(game, player)
+        else:
+            move = opponent_move(game, player, opponent)
+        game.make_move(move, player)
+        if game.current_winner is not None:
+            break
+        player = 'O' if player == 'X' else 'X'
+    if game.current_winner == q_letter:
+        reward = WIN_REWARD
+    elif game.current_winner is not None:
+        reward = -WIN_REWARD
+    else:
+        reward = DRAW_REWARD
+    qlearning.update_terminal_connect4(reward)
+    return reward
+
+def table_delta(table, base_values, base_visits):
+    base_size = len(base_visits)
+    values = table.values[:table.size]
+    visits = table.visits[:table.size]
+    changed = np.ones(table.size, dtype=bool)
+    changed[:base_size] = (values[:base_size] != base_values).any(axis=1) | (visits[:base_size] != base_visits)
+    visit_delta = visits.astype(np.int64)
+    visit_delta[:base_size] -= base_visits
+    return table.row_keys[:table.size][changed], values[changed], visit_delta[changed]
+
+def apply_merged(table, keys, values, visits):
+    rows = np.array([table.row_for(int(key)) for key in keys], dtype=np.int64)
+    if len(rows):
+        table.scatter_rows(rows, values)
+        table.scatter_visits(rows, visits)
+
+def _worker_loop(conn, snapshot, opponent, seed):
+    random.seed(seed)
+    qlearning.SAVE_FREQUENCY = 0
+    qlearning.Q_table = QTable.from_snapshot(snapshot)
+    while True:
+        message = conn.recv()
+        if message[0] == "stop":
+            break
+        _, games, merged = message
+        if merged is not None:
+            apply_merged(qlearning.Q_table, *merged)
+        table = qlearning.Q_table
+        base_values = table.values[:table.size].copy()
+        base_visits = table.visits[:table.size].copy()
+        start = time.time()
+        rewards = [play_training_game(opponent) for _ in range(games)]
+        conn.send({
+            "delta": table_delta(table, base_values, base_visits),
+            "games": games,
+            "wins": sum(1 for reward in rewards if reward > 0),
+            "seconds": time.time() - start,
+            "pid": os.getpid()
+        })
+    conn.close()
+
+def merge_deltas(table, deltas):
+    keys = np.concatenate([delta[0] for delta in deltas])
+    if not len(keys):
+        return None
+    values = np.concatenate([delta[1] for delta in deltas]).astype(np.float64)
+    visit_delta = np.concatenate([delta[2] for delta in deltas])
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    rows = np.array([table.row_for(int(key)) for key in unique_keys], dtype=np.int64)
+    prior_visits = table.gather_visits(rows).astype(np.int64)
+    weights = np.maximum(visit_delta, 1).astype(np.float64)
+    weighted = table.gather(rows).astype(np.float64) * prior_visits[:, np.newaxis]
+    total_weight = prior_visits.astype(np.float64)
+    np.add.at(weighted, inverse, values * weights[:, np.newaxis])
+    np.add.at(total_weight, inverse, weights)
+    merged_values = (weighted / total_weight[:, np.newaxis]).astype(np.float32)
+    merged_visits = prior_visits.copy()
+    np.add.at(merged_visits, inverse, visit_delta)
+    merged_visits = np.minimum(merged_visits, np.iinfo(np.uint32).max).astype(np.uint32)
+    table.scatter_rows(rows, merged_values)
+    table.scatter_visits(rows, merged_visits)
+    return unique_keys, merged_values, merged_visits
+
+class ParallelTrainer:
+    def __init__(self, workers=None, opponent="baseline", sync_every=SYNC_EVERY_GAMES, seed=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.opponent = opponent
+        self.sync_every = sync_every
+        seed = seed if seed is not None else int(time.time())
+        snapshot = qlearning.Q_table.snapshot()
+        context = multiprocessing.get_context()
+        self.connections = []
+        self.processes = []
+        for i in range(self.workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_loop, args=(child_conn, snapshot, opponent, seed + i), daemon=True)
+            process.start()
+            child_conn.close()
+            self.connections.append(parent_conn)
+            self.processes.append(process)
+        self.merged = None
+
+    def train(self, games, verbose=True):
+        results = {"games": 0, "wins": 0, "rounds": 0, "per_worker": {}}
+        start = time.time()
+        while results["games"] < games:
+            remaining = games - results["games"]
+            shard = max(1, min(self.sync_every, -(-remaining // self.workers)))
+            for conn in self.connections:
+                conn.send(("play", shard, self.merged))
+            reports = [conn.recv() for conn in self.connections]
+            self.merged = merge_deltas(qlearning.Q_table, [report["delta"] for report in reports])
+            for report in reports:
+                results["games"] += report["games"]
+                results["wins"] += report["wins"]
+                results["per_worker"][report["pid"]] = results["per_worker"].get(report["pid"], 0) + report["games"]
+                qlearning.save_Q_table_to_disk(games=report["games"])
+            results["rounds"] += 1
+        results["elapsed"] = time.time() - start
+        results["games_per_second"] = results["games"] / results["elapsed"] if results["elapsed"] > 0 else 0.0
+        results["win_rate"] = results["wins"] / results["games"] if results["games"] else 0.0
+        if verbose:
+            print(f"[INFO] {self.workers} workers: {results['games']} games vs {self.opponent} in {results['elapsed']:.1f}s "
+                  f"({results['games_per_second']:.1f} games/s, win rate {results['win_rate']:.2f}, "
+                  f"{len(qlearning.Q_table)} states)")
+        return results
+
+    def close(self):
+        for conn in self.connections:
+            try:
+                conn.send(("stop",))
+            except OSError:
+                pass
+        for process in self.processes:
+            process.join()
+        for conn in self.connections:
+            conn.close()
+        self.connections = []
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def benchmark(games=2000, worker_counts=None, opponent="baseline"):
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n < cores] + [cores]
+    results = []
+    for workers in worker_counts:
+        qlearning.Q_table = QTable()
+        with ParallelTrainer(workers, opponent) as trainer:
+            result = trainer.train(games, verbose=False)
+        results.append({"workers": workers, "seconds": result["elapsed"], "games": result["games"],
+                        "games_per_second": result["games_per_second"]})
+    for result in results:
+        result["speedup"] = result["games_per_second"] / results[0]["games_per_second"]
+        print(f"workers={result['workers']:>3}  time={result['seconds']:.2f}s  "
+              f"games={result['games']}  gps={result['games_per_second']:.1f}  speedup={result['speedup']:.2f}x")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the Connect4 Q-learner with parallel self-play workers.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--opponent", choices=("baseline", "minimax"), default="baseline")
+    parser.add_argument("--sync-every", type=int, default=SYNC_EVERY_GAMES)
+    parser.add_argument("--load", action="store_true")
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.games, opponent=args.opponent)
+    else:
+        if args.load:
+            qlearning.load_model()
+        with ParallelTrainer(args.workers, args.opponent, args.sync_every) as trainer:
+            trainer.train(args.games)
+        qlearning.save_model()
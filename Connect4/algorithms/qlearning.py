@@ -1,11 +1,13 @@
 import random
-import pickle
 import os
-import time
-import numpy as np
 
-Q_table = {}
-state_visits = {}
+from geometry import window_shaping
+from algorithms.qtable import QTable, check_board, state_key
+from algorithms.checkpoint import CheckpointWriter
+from algorithms.model_file import is_model_file, load_model_file, load_pickle_table, save_model_file, write_model
+from algorithms.replay import ReplayBuffer, legal_bits, replay_update, REPLAY_CAPACITY, REPLAY_BATCH_SIZE, REPLAY_EVERY
+
+Q_table = QTable()
 last_state = None
 last_action = None
 
@@ -15,102 +17,84 @@ EPSILON = 0.7
 EPSILON_MIN = 0.1
 EPSILON_DECAY = 0.9999
 
+MODEL_PATH = "qlearning_model.qtab"
+LEGACY_MODEL_PATH = "qlearning_model.pkl"
 SAVE_FREQUENCY = 5000
-game_counter = 0
-last_save_time = time.time()
+MAX_BACKUPS = 5
+BACKUP_EVERY = 10
+checkpoint_writer = None
 
-def state_str(game, player):
-    board_str = ''.join(''.join(row) for row in game.board)
-    return f"{board_str}:{player}"
+replay_buffer = None
+replay_batch_size = REPLAY_BATCH_SIZE
+replay_every = REPLAY_EVERY
 
 def evaluate_window(window, player):
     opponent = 'O' if player == 'X' else 'X'
-    score = 0
-    if window.count(player) == 4:
-        return 1000
-    if window.count(opponent) == 3 and window.count(' ') == 1:
-        return 50
-    if window.count(player) == 3 and window.count(' ') == 1:
-        score += 20
-    elif window.count(player) == 2 and window.count(' ') == 2:
-        score += 5
-    if window.count(opponent) == 2 and window.count(' ') == 2:
-        score += 3
-    return score
+    return window_shaping(window.count(player), window.count(opponent), len(window))
 
 def evaluate_board(game, player):
-    score = 0
-    board = game.board
-    rows = game.rows
-    cols = game.cols
-    center_col = cols // 2
-    center_array = [board[r][center_col] for r in range(rows)]
-    center_count = center_array.count(player)
-    score += center_count * 10
-    for r in range(rows):
-        for c in range(cols - 3):
-            window = [board[r][c+i] for i in range(4)]
-            score += evaluate_window(window, player)
-    for c in range(cols):
-        for r in range(rows - 3):
-            window = [board[r+i][c] for i in range(4)]
-            score += evaluate_window(window, player)
-    for r in range(rows - 3):
-        for c in range(cols - 3):
-            window = [board[r+i][c+i] for i in range(4)]
-            score += evaluate_window(window, player)
-    for r in range(3, rows):
-        for c in range(cols - 3):
-            window = [board[r-i][c+i] for i in range(4)]
-            score += evaluate_window(window, player)
-    return score
-
-def save_Q_table_to_disk(force=False):
-    global Q_table, game_counter, last_save_time
-    game_counter += 1
-    current_time = time.time()
-    if force or (game_counter % SAVE_FREQUENCY == 0 and current_time - last_save_time > 60):
-        filename = f"qlearning_model.pkl"
-        with open(filename, "wb") as f:
-            pickle.dump(Q_table, f)
-        print(f"[INFO] Q-table saved to: {filename}")
-        last_save_time = current_time
-        if game_counter % (SAVE_FREQUENCY * 10) == 0:
-            timestamp = int(time.time())
-            backup_filename = f"qlearning_backup_{timestamp}.pkl"
-            with open(backup_filename, "wb") as f:
-                pickle.dump(Q_table, f)
+    return game.evaluator.shaping_score(player)
+
+def get_checkpoint_writer():
+    global checkpoint_writer
+    if checkpoint_writer is None:
+        checkpoint_writer = CheckpointWriter(MODEL_PATH, SAVE_FREQUENCY, MAX_BACKUPS, BACKUP_EVERY,
+                                             serializer=write_model)
+    return checkpoint_writer
+
+def save_Q_table_to_disk(force=False, games=1):
+    writer = get_checkpoint_writer()
+    if force:
+        writer.submit(Q_table.snapshot())
+    else:
+        writer.game_finished(Q_table.snapshot, games)
+
+def enable_replay(capacity=REPLAY_CAPACITY, batch_size=REPLAY_BATCH_SIZE, every=REPLAY_EVERY, seed=None):
+    global replay_buffer, replay_batch_size, replay_every
+    replay_buffer = ReplayBuffer(capacity, seed)
+    replay_batch_size = batch_size
+    replay_every = every
+
+def disable_replay():
+    global replay_buffer
+    replay_buffer = None
+
+def record_transition(state, action, reward, next_state, done, next_moves=()):
+    if replay_buffer is None:
+        return
+    replay_buffer.add(state, action, reward, next_state, done, legal_bits(next_moves))
+    if replay_buffer.added % replay_every == 0:
+        replay_update(Q_table, replay_buffer, replay_batch_size, ALPHA, GAMMA)
+
+def ensure_table(rows, cols):
+    global Q_table
+    check_board(rows, cols)
+    if Q_table.actions != cols:
+        if len(Q_table):
+            raise ValueError(f"The Q-table was trained on {Q_table.actions}-column boards and cannot play "
+                             f"{cols} columns")
+        Q_table = QTable(cols)
+    return Q_table
 
 def q_learning_move_connect4(game, player):
-    global Q_table, state_visits, last_state, last_action, EPSILON
-    current_state = state_str(game, player)
+    global Q_table, last_state, last_action, EPSILON
+    ensure_table(game.rows, game.cols)
+    current_state = state_key(game, player)
     available_moves = game.available_moves()
-    if current_state not in Q_table:
-        Q_table[current_state] = {move: 0.0 for move in available_moves}
-    state_visits[current_state] = state_visits.get(current_state, 0) + 1
-    for move in available_moves:
-        game_copy = Connect4()
-        game_copy.board = [row[:] for row in game.board]
-        game_copy.make_move(move, player)
-        if game_copy.current_winner == player:
-            if current_state not in Q_table:
-                Q_table[current_state] = {}
-            Q_table[current_state][move] = 100.0
-            last_state = current_state
-            last_action = move
-            return move
+    current_row = Q_table.visit(current_state)
+    wins = game.winning_moves(player)
+    if wins:
+        Q_table.row_values(current_row)[wins[0]] = 100.0
+        last_state = current_state
+        last_action = wins[0]
+        return wins[0]
     opponent = 'O' if player == 'X' else 'X'
-    for move in available_moves:
-        game_copy = Connect4()
-        game_copy.board = [row[:] for row in game.board]
-        game_copy.make_move(move, opponent)
-        if game_copy.current_winner == opponent:
-            if current_state not in Q_table:
-                Q_table[current_state] = {}
-            Q_table[current_state][move] = 80.0
-            last_state = current_state
-            last_action = move
-            return move
+    blocks = game.winning_moves(opponent)
+    if blocks:
+        Q_table.row_values(current_row)[blocks[0]] = 80.0
+        last_state = current_state
+        last_action = blocks[0]
+        return blocks[0]
     if random.random() < EPSILON:
         center_col = game.cols // 2
         if center_col in available_moves and random.random() < 0.7:
@@ -118,21 +102,16 @@ def q_learning_move_connect4(game, player):
         else:
             action = random.choice(available_moves)
     else:
-        if current_state in Q_table and Q_table[current_state]:
-            action = max(available_moves, key=lambda a: Q_table[current_state].get(a, 0.0))
-        else:
-            center_col = game.cols // 2
-            if center_col in available_moves:
-                action = center_col
-            else:
-                action = random.choice(available_moves)
+        current_values = Q_table.row_values(current_row)
+        action = max(available_moves, key=lambda a: current_values[a])
     if last_state and last_action:
-        if last_state not in Q_table:
-            Q_table[last_state] = {}
+        last_row = Q_table.row_for(last_state)
         reward = evaluate_board(game, player) / 50.0
-        future_q = max(Q_table[current_state].values()) if Q_table[current_state] else 0.0
-        old_q = Q_table[last_state].get(last_action, 0.0)
-        Q_table[last_state][last_action] = old_q + ALPHA * (reward + GAMMA * future_q - old_q)
+        future_q = Q_table.best_value(current_row, available_moves)
+        last_values = Q_table.row_values(last_row)
+        old_q = float(last_values[last_action])
+        last_values[last_action] = old_q + ALPHA * (reward + GAMMA * future_q - old_q)
+        record_transition(last_state, last_action, reward, current_state, False, available_moves)
     last_state = current_state
     last_action = action
     EPSILON = max(EPSILON_MIN, EPSILON * EPSILON_DECAY)
@@ -141,11 +120,12 @@ def q_learning_move_connect4(game, player):
 def update_terminal_connect4(last_reward):
     global Q_table, last_state, last_action
     if last_state and last_action:
-        if last_state not in Q_table:
-            Q_table[last_state] = {}
-        old_q = Q_table[last_state].get(last_action, 0.0)
-        Q_table[last_state][last_action] = old_q + ALPHA * (last_reward - old_q)
-        save_Q_table_to_disk(force=abs(last_reward) > 5)
+        last_row = Q_table.row_for(last_state)
+        last_values = Q_table.row_values(last_row)
+        old_q = float(last_values[last_action])
+        last_values[last_action] = old_q + ALPHA * (last_reward - old_q)
+        record_transition(last_state, last_action, last_reward, 0, True)
+    save_Q_table_to_disk()
     reset_episode_state()
 
 def reset_episode_state():
@@ -153,26 +133,21 @@ def reset_episode_state():
     last_state = None
     last_action = None
 
-def save_model(filename="qlearning_model.pkl"):
-    with open(filename, "wb") as f:
-        pickle.dump(Q_table, f)
+def save_model(filename=MODEL_PATH):
+    if checkpoint_writer is not None:
+        checkpoint_writer.flush()
+    save_model_file(Q_table, filename)
     print(f"[INFO] Q-learning model saved to {filename}")
 
-def load_model(filename="qlearning_model.pkl"):
+def load_model(filename=MODEL_PATH):
     global Q_table
+    if filename == MODEL_PATH and not os.path.exists(filename) and os.path.exists(LEGACY_MODEL_PATH):
+        filename = LEGACY_MODEL_PATH
     try:
-        with open(filename, "rb") as f:
-            Q_table = pickle.load(f)
+        if is_model_file(filename):
+            Q_table = load_model_file(filename)
+        else:
+            Q_table = load_pickle_table(filename)
         print(f"[INFO] Q-learning model loaded from {filename}")
     except FileNotFoundError:
         print("[WARN] No saved Q-table found. Starting fresh.")
-
-try:
-    from game import Connect4
-except ImportError:
-    class Connect4:
-        def __init__(self, rows=6, cols=7):
-            self.rows = rows
-            self.cols = cols
-            self.board = [[' ' for _ in range(cols)] for _ in range(rows)]
-            self.current_winner = None
\ No newline at end of file
@@ -0,0 +1,211 @@
+from array import array
+
+import numpy as np
+
+EMPTY_KEY = 0
+NO_ROW = -1
+INITIAL_CAPACITY = 1 << 16
+MAX_LOAD = 0.5
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+KEY_MASK = (1 << 64) - 1
+# keys hold rows + 1 bits per column plus the player bit and are stored as u8
+MAX_KEY_BITS = 64
+
+def key_bits(rows, cols):
+    return cols * (rows + 1) + 1
+
+def check_board(rows, cols):
+    if key_bits(rows, cols) > MAX_KEY_BITS:
+        raise ValueError(f"A {rows}x{cols} board needs {key_bits(rows, cols)}-bit state keys; the Q-table only "
+                         f"supports boards with cols * (rows + 1) <= {MAX_KEY_BITS - 1}")
+
+def state_key(game, player):
+    masks = getattr(game, "masks", None)
+    if masks is not None:
+        heights = masks['X'] + masks['O'] + game.bottom_mask
+        return ((masks[player] + heights) << 1) | (player == 'O')
+    rows = game.rows
+    stride = rows + 1
+    board = game.board
+    key = 0
+    for col in range(game.cols):
+        h = 0
+        for row in range(rows - 1, -1, -1):
+            cell = board[row][col]
+            if cell == ' ':
+                break
+            if cell == player:
+                key |= 1 << (col * stride + h)
+            h += 1
+        key |= 1 << (col * stride + h)
+    return (key << 1) | (player == 'O')
+
+def key_from_state_str(state, rows=6, cols=7):
+    cells, player = state.rsplit(":", 1)
+    stride = rows + 1
+    key = 0
+    for col in range(cols):
+        h = 0
+        for row in range(rows - 1, -1, -1):
+            cell = cells[row * cols + col]
+            if cell == ' ':
+                break
+            if cell == player:
+                key |= 1 << (col * stride + h)
+            h += 1
+        key |= 1 << (col * stride + h)
+    return (key << 1) | (player == 'O')
+
+class QTable:
+    def __init__(self, actions=7, capacity=INITIAL_CAPACITY):
+        self.actions = actions
+        self.size = 0
+        self.values = np.zeros((capacity, actions), dtype=np.float32)
+        self.visits = np.zeros(capacity, dtype=np.uint32)
+        self.row_keys = np.zeros(capacity, dtype=np.uint64)
+        self._build_index(capacity)
+
+    def _build_index(self, rows):
+        slots = 1
+        while slots * MAX_LOAD < rows:
+            slots *= 2
+        self.index_mask = slots - 1
+        self.index_keys = array('Q', bytes(8 * slots))
+        self.index_rows = array('i', [NO_ROW]) * slots
+        for row in range(self.size):
+            self._insert_slot(int(self.row_keys[row]), row)
+
+    def _insert_slot(self, key, row):
+        mask = self.index_mask
+        slot = ((key * HASH_MULTIPLIER) & KEY_MASK) >> 32 & mask
+        while self.index_keys[slot] != EMPTY_KEY:
+            slot = (slot + 1) & mask
+        self.index_keys[slot] = key
+        self.index_rows[slot] = row
+
+    def _grow(self):
+        capacity = 2 * len(self.values)
+        values = np.zeros((capacity, self.actions), dtype=np.float32)
+        values[:self.size] = self.values[:self.size]
+        visits = np.zeros(capacity, dtype=np.uint32)
+        visits[:self.size] = self.visits[:self.size]
+        row_keys = np.zeros(capacity, dtype=np.uint64)
+        row_keys[:self.size] = self.row_keys[:self.size]
+        self.values, self.visits, self.row_keys = values, visits, row_keys
+        self._build_index(capacity)
+
+    def find(self, key):
+        index_keys = self.index_keys
+        mask = self.index_mask
+        slot = ((key * HASH_MULTIPLIER) & KEY_MASK) >> 32 & mask
+        while True:
+            stored = index_keys[slot]
+            if stored == key:
+                return self.index_rows[slot]
+            if stored == EMPTY_KEY:
+                return NO_ROW
+            slot = (slot + 1) & mask
+
+    def row_for(self, key):
+        row = self.find(key)
+        if row == NO_ROW:
+            if self.size == len(self.values):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.row_keys[row] = key
+            self._insert_slot(key, row)
+        return row
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return self.find(key) != NO_ROW
+
+    def get(self, key, action, default=0.0):
+        row = self.find(key)
+        if row == NO_ROW:
+            return default
+        return float(self.row_values(row)[action])
+
+    def set(self, key, action, value):
+        self.row_values(self.row_for(key))[action] = value
+
+    def visit(self, key):
+        row = self.row_for(key)
+        self.visits[row] += 1
+        return row
+
+    def visit_batch(self, keys):
+        return np.array([self.visit(int(key)) for key in keys], dtype=np.int64)
+
+    def gather(self, rows):
+        return self.values[rows]
+
+    def scatter(self, rows, actions, values):
+        self.values[rows, actions] = values
+
+    def scatter_rows(self, rows, values):
+        self.values[rows] = values
+
+    def gather_visits(self, rows):
+        return self.visits[rows]
+
+    def scatter_visits(self, rows, visits):
+        self.visits[rows] = visits
+
+    def best_value(self, row, actions):
+        values = self.row_values(row)
+        return max(float(values[a]) for a in actions) if actions else 0.0
+
+    def row_values(self, row):
+        return self.values[row]
+
+    def snapshot(self):
+        return (self.row_keys[:self.size].copy(), self.values[:self.size].copy(), self.visits[:self.size].copy())
+
+    def memory_bytes(self):
+        return (self.values.nbytes + self.visits.nbytes + self.row_keys.nbytes +
+                self.index_keys.itemsize * len(self.index_keys) + self.index_rows.itemsize * len(self.index_rows))
+
+    def bytes_per_state(self):
+        return self.memory_bytes() / self.size if self.size else 0.0
+
+    def __getstate__(self):
+        return {
+            "actions": self.actions,
+            "values": self.values[:self.size].copy(),
+            "visits": self.visits[:self.size].copy(),
+            "row_keys": self.row_keys[:self.size].copy()
+        }
+
+    def __setstate__(self, state):
+        self.actions = state["actions"]
+        self.size = len(state["row_keys"])
+        capacity = max(INITIAL_CAPACITY, self.size)
+        self.values = np.zeros((capacity, self.actions), dtype=np.float32)
+        self.values[:self.size] = state["values"]
+        self.visits = np.zeros(capacity, dtype=np.uint32)
+        self.visits[:self.size] = state["visits"]
+        self.row_keys = np.zeros(capacity, dtype=np.uint64)
+        self.row_keys[:self.size] = state["row_keys"]
+        self._build_index(capacity)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        keys, values, visits = snapshot
+        table = cls.__new__(cls)
+        table.__setstate__({"actions": values.shape[1], "values": values, "visits": visits, "row_keys": keys})
+        return table
+
+    @classmethod
+    def from_dict(cls, q_dict, visits=None, rows=6, cols=7):
+        table = cls(cols, max(INITIAL_CAPACITY, len(q_dict)))
+        for state, action_values in q_dict.items():
+            row = table.row_for(key_from_state_str(state, rows, cols))
+            for action, value in action_values.items():
+                table.values[row, action] = value
+            if visits is not None:
+                table.visits[row] = visits.get(state, 0)
+        return table
@@ -0,0 +1,119 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+REPLAY_CAPACITY = 1 << 16
+REPLAY_BATCH_SIZE = 256
+REPLAY_EVERY = 16
+BENCHMARK_TARGET = 0.7
+BENCHMARK_MAX_GAMES = 6000
+
+class ReplayBuffer:
+    def __init__(self, capacity=REPLAY_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.uint64)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros(capacity, dtype=np.uint64)
+        self.next_legal = np.zeros(capacity, dtype=np.uint16)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.position = 0
+        self.size = 0
+        self.added = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done, next_legal=0):
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.next_legal[i] = next_legal
+        self.dones[i] = done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.added += 1
+
+    def sample(self, batch_size):
+        return self.rng.integers(0, self.size, size=min(batch_size, self.size))
+
+def legal_bits(moves):
+    bits = 0
+    for move in moves:
+        bits |= 1 << move
+    return bits
+
+def replay_update(table, buffer, batch_size, alpha, gamma):
+    if not len(buffer):
+        return 0
+    index = buffer.sample(batch_size)
+    rows = np.array([table.row_for(int(key)) for key in buffer.states[index]], dtype=np.int64)
+    actions = buffer.actions[index].astype(np.int64)
+    targets = buffer.rewards[index].astype(np.float64)
+    pending = ~buffer.dones[index]
+    if pending.any():
+        next_rows = np.array([table.row_for(int(key)) for key in buffer.next_states[index][pending]], dtype=np.int64)
+        next_values = table.gather(next_rows).astype(np.float64)
+        legal = (buffer.next_legal[index][pending][:, np.newaxis] >> np.arange(table.actions)) & 1
+        next_values[legal == 0] = -np.inf
+        best = next_values.max(axis=1)
+        targets[pending] += gamma * np.where(np.isfinite(best), best, 0.0)
+    old_q = table.gather(rows)[np.arange(len(rows)), actions]
+    table.scatter(rows, actions, (old_q + alpha * (targets - old_q)).astype(np.float32))
+    return len(rows)
+
+def games_to_win_rate(use_replay, target_win_rate=BENCHMARK_TARGET, window=200, max_games=BENCHMARK_MAX_GAMES, seed=0,
+                      opponent="baseline"):
+    from algorithms import qlearning, parallel_training
+    from algorithms.qtable import QTable
+    random.seed(seed)
+    qlearning.Q_table = QTable()
+    qlearning.EPSILON = 0.7
+    qlearning.SAVE_FREQUENCY = 0
+    qlearning.reset_episode_state()
+    if use_replay:
+        qlearning.enable_replay(seed=seed)
+    else:
+        qlearning.disable_replay()
+    outcomes = []
+    for game in range(1, max_games + 1):
+        outcomes.append(parallel_training.play_training_game(opponent) > 0)
+        if len(outcomes) >= window and sum(outcomes[-window:]) / window >= target_win_rate:
+            return game
+    return None
+
+def benchmark(target_win_rate=BENCHMARK_TARGET, window=200, max_games=BENCHMARK_MAX_GAMES, seeds=(0, 1, 2, 3, 4)):
+    results = []
+    for use_replay in (False, True):
+        start = time.time()
+        games = [games_to_win_rate(use_replay, target_win_rate, window, max_games, seed) for seed in seeds]
+        capped = np.array([max_games if g is None else g for g in games], dtype=np.float64)
+        stderr = capped.std(ddof=1) / np.sqrt(len(capped)) if len(capped) > 1 else 0.0
+        results.append({"replay": use_replay, "games": games, "mean_games": float(capped.mean()),
+                        "stderr": float(stderr), "seconds": time.time() - start})
+        label = "replay" if use_replay else "online"
+        print(f"{label:>7}: games to {target_win_rate:.0%} vs baseline per seed={games}  "
+              f"mean={capped.mean():.0f}±{stderr:.0f}  time={results[-1]['seconds']:.1f}s")
+    online, replayed = results
+    gain = online["mean_games"] - replayed["mean_games"]
+    noise = 2 * np.hypot(online["stderr"], replayed["stderr"])
+    if gain > noise:
+        print(f"[INFO] Replay saved {gain:.0f} games (noise ±{noise:.0f})")
+    else:
+        print(f"[INFO] No gain from replay beyond seed noise ({gain:+.0f} games, noise ±{noise:.0f})")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare games needed to beat baseline with and without replay.")
+    parser.add_argument("--target", type=float, default=BENCHMARK_TARGET)
+    parser.add_argument("--window", type=int, default=200)
+    parser.add_argument("--max-games", type=int, default=BENCHMARK_MAX_GAMES,
+                        help="games allowed per seed; seeds that never reach the target count as this many")
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.target, args.window, args.max_games, tuple(range(args.seeds)))
@@ -0,0 +1,193 @@
+import argparse
+import time
+
+import numpy as np
+
+from algorithms import qlearning
+from algorithms.batch_eval import CELL_VALUES, window_index, evaluate_boards_qlearning
+from algorithms.qtable import check_board
+
+WIN_REWARD = 10.0
+DRAW_REWARD = 0.0
+WIN_MOVE_Q = 100.0
+BLOCK_MOVE_Q = 80.0
+CENTER_BIAS = 0.7
+
+class BatchConnect4:
+    def __init__(self, batch_size, rows=6, cols=7, k=4, seed=None):
+        check_board(rows, cols)
+        self.batch_size = batch_size
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.windows = window_index(rows, cols, k)
+        self.stride = rows + 1
+        heights = rows - 1 - np.arange(rows)[:, np.newaxis]
+        self.bit_weights = (np.uint64(1) << (np.arange(cols, dtype=np.uint64) * np.uint64(self.stride) +
+                                             heights.astype(np.uint64))).ravel()
+        self.bottom_mask = sum(1 << (col * self.stride) for col in range(cols))
+        self.boards = np.zeros((batch_size, rows, cols), dtype=np.int8)
+        self.heights = np.zeros((batch_size, cols), dtype=np.int8)
+        self.to_move = np.ones(batch_size, dtype=np.int8)
+        self.reset()
+
+    def reset(self, games=None):
+        if games is None:
+            games = np.arange(self.batch_size)
+        self.boards[games] = 0
+        self.heights[games] = 0
+        self.to_move[games] = np.where(self.rng.random(len(games)) < 0.5, CELL_VALUES['X'], CELL_VALUES['O'])
+
+    def legal_moves(self, games):
+        return self.heights[games] < self.rows
+
+    def drop_cells(self, games):
+        return (self.rows - 1 - self.heights[games].astype(np.intp)) * self.cols + np.arange(self.cols)
+
+    def winning_moves(self, games, values):
+        flat = self.boards[games].reshape(len(games), -1)
+        cells = flat[:, self.windows]
+        own = (cells == values[:, np.newaxis, np.newaxis]).sum(axis=2)
+        empty = cells == 0
+        threats = (own == self.k - 1) & (empty.sum(axis=2) == 1)
+        winning_cells = np.zeros(flat.shape, dtype=bool)
+        game_idx, window_idx = np.nonzero(threats)
+        slot = empty[game_idx, window_idx].argmax(axis=1)
+        winning_cells[game_idx, self.windows[window_idx, slot]] = True
+        drop = np.clip(self.drop_cells(games), 0, flat.shape[1] - 1)
+        return np.take_along_axis(winning_cells, drop, axis=1) & self.legal_moves(games)
+
+    def state_keys(self, games, values):
+        flat = self.boards[games].reshape(len(games), -1)
+        weights = self.bit_weights
+        position = np.where(flat == values[:, np.newaxis], weights, np.uint64(0)).sum(axis=1, dtype=np.uint64)
+        mask = np.where(flat != 0, weights, np.uint64(0)).sum(axis=1, dtype=np.uint64)
+        keys = (position + mask + np.uint64(self.bottom_mask)) << np.uint64(1)
+        return keys | (values == CELL_VALUES['O']).astype(np.uint64)
+
+    def step(self, games, actions):
+        values = self.to_move[games]
+        rows = self.rows - 1 - self.heights[games, actions]
+        self.boards[games, rows, actions] = values
+        self.heights[games, actions] += 1
+        flat = self.boards[games].reshape(len(games), -1)
+        won = (flat[:, self.windows] == values[:, np.newaxis, np.newaxis]).all(axis=2).any(axis=1)
+        full = (self.heights[games] >= self.rows).all(axis=1)
+        self.to_move[games] = -values
+        return won, full & ~won
+
+class BatchQLearner:
+    def __init__(self, env):
+        self.env = env
+        self.cols = env.cols
+        self.last_rows = {value: np.full(env.batch_size, -1, dtype=np.int64) for value in (1, -1)}
+        self.last_actions = {value: np.full(env.batch_size, -1, dtype=np.int64) for value in (1, -1)}
+
+    def select(self, games, value):
+        env = self.env
+        table = qlearning.Q_table
+        rng = env.rng
+        letter = 'X' if value == CELL_VALUES['X'] else 'O'
+        values = np.full(len(games), value, dtype=np.int8)
+        rows = table.visit_batch(env.state_keys(games, values))
+        legal = env.legal_moves(games)
+        win_now = env.winning_moves(games, values)
+        block = env.winning_moves(games, -values)
+        has_win = win_now.any(axis=1)
+        has_block = ~has_win & block.any(axis=1)
+        forced = np.where(has_win, win_now.argmax(axis=1), block.argmax(axis=1))
+        if has_win.any():
+            table.scatter(rows[has_win], forced[has_win], np.float32(WIN_MOVE_Q))
+        if has_block.any():
+            table.scatter(rows[has_block], forced[has_block], np.float32(BLOCK_MOVE_Q))
+
+        q_values = table.gather(rows)
+        q_values[~legal] = -np.inf
+        greedy = q_values.argmax(axis=1)
+        noise = rng.random(legal.shape)
+        noise[~legal] = -1.0
+        random_moves = noise.argmax(axis=1)
+        center = self.cols // 2
+        explore = rng.random(len(games)) < qlearning.EPSILON
+        use_center = explore & legal[:, center] & (rng.random(len(games)) < CENTER_BIAS)
+        actions = np.where(explore, np.where(use_center, center, random_moves), greedy)
+
+        learn = ~(has_win | has_block)
+        last_rows = self.last_rows[value][games]
+        last_actions = self.last_actions[value][games]
+        update = learn & (last_rows >= 0)
+        if update.any():
+            reward = evaluate_boards_qlearning(env.boards[games[update]], letter, env.k) / 50.0
+            future_q = q_values[update].max(axis=1)
+            old_q = table.gather(last_rows[update])[np.arange(update.sum()), last_actions[update]]
+            table.scatter(last_rows[update], last_actions[update],
+                          (old_q + qlearning.ALPHA * (reward + qlearning.GAMMA * future_q - old_q)).astype(np.float32))
+        qlearning.EPSILON = max(qlearning.EPSILON_MIN, qlearning.EPSILON * qlearning.EPSILON_DECAY ** int(learn.sum()))
+
+        actions = np.where(learn, actions, forced)
+        self.last_rows[value][games] = rows
+        self.last_actions[value][games] = actions
+        return actions
+
+    def finish(self, games, value, reward):
+        table = qlearning.Q_table
+        last_rows = self.last_rows[value][games]
+        last_actions = self.last_actions[value][games]
+        known = last_rows >= 0
+        if known.any():
+            rows = last_rows[known]
+            actions = last_actions[known]
+            old_q = table.gather(rows)[np.arange(len(rows)), actions]
+            table.scatter(rows, actions, (old_q + qlearning.ALPHA * (reward - old_q)).astype(np.float32))
+        self.last_rows[value][games] = -1
+        self.last_actions[value][games] = -1
+
+def train_selfplay(games, batch_size=256, rows=6, cols=7, k=4, seed=None, verbose=True):
+    env = BatchConnect4(batch_size, rows, cols, k, seed)
+    qlearning.ensure_table(rows, cols)
+    learner = BatchQLearner(env)
+    results = {"games": 0, "x_wins": 0, "o_wins": 0, "draws": 0, "moves": 0}
+    start = time.time()
+    all_games = np.arange(batch_size)
+    while results["games"] < games:
+        for value in (CELL_VALUES['X'], CELL_VALUES['O']):
+            movers = all_games[env.to_move == value]
+            if not len(movers):
+                continue
+            actions = learner.select(movers, value)
+            won, drawn = env.step(movers, actions)
+            results["moves"] += len(movers)
+            winners = movers[won]
+            if len(winners):
+                learner.finish(winners, value, WIN_REWARD)
+                learner.finish(winners, -value, -WIN_REWARD)
+                results["x_wins" if value == CELL_VALUES['X'] else "o_wins"] += len(winners)
+            draws = movers[drawn]
+            if len(draws):
+                learner.finish(draws, value, DRAW_REWARD)
+                learner.finish(draws, -value, DRAW_REWARD)
+                results["draws"] += len(draws)
+            finished = np.concatenate([winners, draws])
+            if len(finished):
+                env.reset(finished)
+                qlearning.save_Q_table_to_disk(games=len(finished))
+                results["games"] += len(finished)
+    results["elapsed"] = time.time() - start
+    results["games_per_second"] = results["games"] / results["elapsed"] if results["elapsed"] > 0 else 0.0
+    if verbose:
+        print(f"[INFO] {results['games']} self-play games in {results['elapsed']:.1f}s "
+              f"({results['games_per_second']:.0f} games/s, {len(qlearning.Q_table)} states)")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the Connect4 Q-learner with batched self-play.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--load", action="store_true")
+    args = parser.parse_args()
+    if args.load:
+        qlearning.load_model()
+    train_selfplay(args.games, args.batch_size, seed=args.seed)
+    qlearning.save_model()
@@ -0,0 +1,164 @@
+from game import game_from_board
+
+SOLVER_TT_ENTRIES = 1 << 20
+
+class EndgameSolver:
+    def __init__(self, rows=6, cols=7, tt_entries=SOLVER_TT_ENTRIES):
+        self.rows = rows
+        self.cols = cols
+        self.cells = rows * cols
+        self.stride = rows + 1
+        self.bottom_mask = sum(1 << (col * self.stride) for col in range(cols))
+        self.board_mask = self.bottom_mask * ((1 << rows) - 1)
+        self.column_masks = [((1 << rows) - 1) << (col * self.stride) for col in range(cols)]
+        self.order = sorted(range(cols), key=lambda col: abs(2 * col - (cols - 1)))
+        self.tt_entries = tt_entries
+        self.tt = {}
+        self.node_count = 0
+
+    def winning_positions(self, position, mask):
+        stride = self.stride
+        result = (position << 1) & (position << 2) & (position << 3)
+        for shift in (stride, stride - 1, stride + 1):
+            pair = (position << shift) & (position << (2 * shift))
+            result |= pair & (position << (3 * shift))
+            result |= pair & (position >> shift)
+            pair = (position >> shift) & (position >> (2 * shift))
+            result |= pair & (position << shift)
+            result |= pair & (position >> (3 * shift))
+        return result & (self.board_mask ^ mask)
+
+    def possible(self, mask):
+        return (mask + self.bottom_mask) & self.board_mask
+
+    def can_win_next(self, position, mask):
+        return self.winning_positions(position, mask) & self.possible(mask)
+
+    def non_losing_moves(self, position, mask):
+        possible = self.possible(mask)
+        opponent_win = self.winning_positions(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            if forced & (forced - 1):
+                return 0
+            possible = forced
+        return possible & ~(opponent_win >> 1)
+
+    def _popcount(self, bits):
+        return bin(bits).count("1")
+
+    def negamax(self, position, mask, moves, alpha, beta):
+        self.node_count += 1
+        cells = self.cells
+        candidates = self.non_losing_moves(position, mask)
+        if not candidates:
+            return -((cells - moves) // 2)
+        if moves >= cells - 2:
+            return 0
+        lower = -((cells - 2 - moves) // 2)
+        if alpha < lower:
+            alpha = lower
+            if alpha >= beta:
+                return alpha
+        upper = (cells - 1 - moves) // 2
+        key = position + mask
+        stored = self.tt.get(key)
+        if stored is not None:
+            upper = stored
+        if beta > upper:
+            beta = upper
+            if alpha >= beta:
+                return beta
+        children = []
+        for col in self.order:
+            move = candidates & self.column_masks[col]
+            if move:
+                threats = self._popcount(self.winning_positions(position | move, mask))
+                children.append((-threats, len(children), move))
+        children.sort()
+        for _, _, move in children:
+            opponent = position ^ mask
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        if len(self.tt) >= self.tt_entries:
+            self.tt.clear()
+        self.tt[key] = alpha
+        return alpha
+
+    def solve_position(self, position, mask, moves):
+        cells = self.cells
+        if self.can_win_next(position, mask):
+            return (cells + 1 - moves) // 2
+        low = -((cells - moves) // 2)
+        high = (cells + 1 - moves) // 2
+        while low < high:
+            mid = low + (high - low) // 2
+            if mid <= 0 and int(low / 2) < mid:
+                mid = int(low / 2)
+            elif mid >= 0 and high // 2 > mid:
+                mid = high // 2
+            result = self.negamax(position, mask, moves, mid, mid + 1)
+            if result <= mid:
+                high = result
+            else:
+                low = result
+        return low
+
+    def plies_to_result(self, score, moves):
+        if score == 0:
+            return self.cells - moves
+        winner_moves = moves if score > 0 else moves + 1
+        end = self.cells + 1 - 2 * abs(score)
+        if (end - winner_moves) % 2:
+            end -= 1
+        return end - moves + 1
+
+    def solve(self, game, player):
+        if not hasattr(game, "masks"):
+            game = game_from_board(game.board)
+        position = game.masks[player]
+        mask = game.occupied_mask()
+        moves = game.move_count
+        self.node_count = 0
+        best_move = None
+        best_score = None
+        for col in self.order:
+            if mask & (1 << (col * self.stride + self.rows - 1)):
+                continue
+            move = (mask + self.bottom_mask) & self.column_masks[col]
+            if self.winning_positions(position, mask) & move:
+                score = (self.cells + 1 - moves) // 2
+            elif moves + 1 >= self.cells:
+                score = 0
+            else:
+                score = -self.solve_position(position ^ mask, mask | move, moves + 1)
+            if best_score is None or score > best_score:
+                best_move, best_score = col, score
+        if best_score > 0:
+            result = "win"
+        elif best_score < 0:
+            result = "loss"
+        else:
+            result = "draw"
+        return {
+            "position": best_move,
+            "score": best_score,
+            "result": result,
+            "plies": self.plies_to_result(best_score, moves),
+            "nodes": self.node_count
+        }
+
+_solvers = {}
+
+def solver_for(rows, cols):
+    solver = _solvers.get((rows, cols))
+    if solver is None:
+        solver = EndgameSolver(rows, cols)
+        _solvers[(rows, cols)] = solver
+    return solver
+
+def solve(game, player):
+    return solver_for(game.rows, game.cols).solve(game, player)
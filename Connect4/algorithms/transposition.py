@@ -0,0 +1,174 @@
+from array import array
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# key (8) + score (8) + depth (1) + flag (1) + move (1)
+ENTRY_BYTES = 19
+# key ^ data (8) + data (8), lockless so torn writes from other processes fail the check
+SHARED_ENTRY_BYTES = 16
+NO_MOVE = -1
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        self.size_mb = size_mb
+        entries = 1
+        while entries * 2 * ENTRY_BYTES <= size_mb * 1024 * 1024:
+            entries *= 2
+        self.size = entries
+        self.index_mask = entries - 1
+        self.keys = array('Q', bytes(8 * entries))
+        self.scores = array('d', bytes(8 * entries))
+        self.depths = array('b', [-1]) * entries
+        self.flags = array('b', bytes(entries))
+        self.moves = array('b', [NO_MOVE]) * entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.collisions = 0
+        self.rejected = 0
+
+    def clear(self):
+        self.__init__(self.size_mb)
+
+    def probe(self, key):
+        slot = key & self.index_mask
+        if self.depths[slot] < 0:
+            self.misses += 1
+            return None
+        if self.keys[slot] != key:
+            self.collisions += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        move = self.moves[slot]
+        return self.depths[slot], self.flags[slot], self.scores[slot], None if move == NO_MOVE else move
+
+    def store(self, key, depth, flag, score, move):
+        slot = key & self.index_mask
+        stored_depth = self.depths[slot]
+        if stored_depth >= 0 and self.keys[slot] != key and stored_depth > depth:
+            self.rejected += 1
+            return False
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.flags[slot] = flag
+        self.scores[slot] = score
+        self.moves[slot] = NO_MOVE if move is None else move
+        self.stores += 1
+        return True
+
+    def best_move(self, key):
+        slot = key & self.index_mask
+        if self.depths[slot] >= 0 and self.keys[slot] == key and self.moves[slot] != NO_MOVE:
+            return self.moves[slot]
+        return None
+
+    def memory_bytes(self):
+        return self.size * ENTRY_BYTES
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "entries": self.size,
+            "memory_bytes": self.memory_bytes(),
+            "probes": probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "stores": self.stores,
+            "collisions": self.collisions,
+            "rejected": self.rejected
+        }
+
+class SharedTranspositionTable:
+    def __init__(self, size_mb=16, name=None):
+        from multiprocessing import shared_memory
+        entries = 1
+        while entries * 2 * SHARED_ENTRY_BYTES <= size_mb * 1024 * 1024:
+            entries *= 2
+        self.size = entries
+        self.index_mask = entries - 1
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=entries * SHARED_ENTRY_BYTES)
+            self.shm.buf[:entries * SHARED_ENTRY_BYTES] = bytes(entries * SHARED_ENTRY_BYTES)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.size_mb = size_mb
+        self.words = self.shm.buf[:entries * SHARED_ENTRY_BYTES].cast('Q')
+        self.checks = self.words[0::2]
+        self.data = self.words[1::2]
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.collisions = 0
+        self.rejected = 0
+
+    def _unpack(self, data):
+        score = data & 0xFFFFFFFF
+        if score >= 0x80000000:
+            score -= 0x100000000
+        move = ((data >> 48) & 0xFF) - 1
+        return ((data >> 32) & 0xFF) - 1, (data >> 40) & 0xFF, float(score), None if move == NO_MOVE else move
+
+    def probe(self, key):
+        slot = key & self.index_mask
+        data = self.data[slot]
+        if not data:
+            self.misses += 1
+            return None
+        if self.checks[slot] ^ data != key:
+            self.collisions += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._unpack(data)
+
+    def store(self, key, depth, flag, score, move):
+        slot = key & self.index_mask
+        data = self.data[slot]
+        if data and self.checks[slot] ^ data != key and ((data >> 32) & 0xFF) - 1 > depth:
+            self.rejected += 1
+            return False
+        data = ((int(score) & 0xFFFFFFFF) | ((depth + 1) << 32) | (flag << 40)
+                | ((NO_MOVE if move is None else move) + 1) << 48)
+        self.checks[slot] = key ^ data
+        self.data[slot] = data
+        self.stores += 1
+        return True
+
+    def best_move(self, key):
+        slot = key & self.index_mask
+        data = self.data[slot]
+        if data and self.checks[slot] ^ data == key:
+            return self._unpack(data)[3]
+        return None
+
+    def memory_bytes(self):
+        return self.size * SHARED_ENTRY_BYTES
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "entries": self.size,
+            "memory_bytes": self.memory_bytes(),
+            "probes": probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "stores": self.stores,
+            "collisions": self.collisions,
+            "rejected": self.rejected
+        }
+
+    def close(self):
+        self.checks.release()
+        self.data.release()
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,9 +1,133 @@
+import random
+
+from geometry import board_geometry, shaping_scores, SHAPING_CENTER_BONUS
+
+ZOBRIST_SEED = 20250401
+_zobrist_rng = random.Random(ZOBRIST_SEED)
+ZOBRIST_SIDE = {'X': _zobrist_rng.getrandbits(64), 'O': _zobrist_rng.getrandbits(64)}
+_zobrist_tables = {}
+
+def zobrist_keys(rows, cols):
+    keys = _zobrist_tables.get((rows, cols))
+    if keys is None:
+        rng = random.Random(ZOBRIST_SEED * 1000003 + rows * 1009 + cols)
+        keys = {letter: [rng.getrandbits(64) for _ in range(rows * cols)] for letter in ('X', 'O')}
+        _zobrist_tables[(rows, cols)] = keys
+    return keys
+
+class IncrementalEvaluator:
+    def __init__(self, rows, cols, k=4):
+        geometry = board_geometry(rows, cols, k)
+        self.rows = rows
+        self.cols = cols
+        self.window_starts = geometry.line_starts
+        self.cell_windows = geometry.cell_lines
+        self.window_scores = geometry.line_scores
+        self.owners = [' '] * (rows * cols)
+        self.counts = {'X': [0] * len(self.window_starts), 'O': [0] * len(self.window_starts)}
+        self.score = 0
+        self.shaping_table = shaping_scores(k)
+        self.shaping_deltas = tuple(
+            tuple((self.shaping_table[own + 1][other] - self.shaping_table[own][other],
+                   self.shaping_table[other][own + 1] - self.shaping_table[other][own])
+                  if own + other < k else (0, 0) for other in range(k + 1))
+            for own in range(k))
+        self.shaping = None
+        self.center_counts = None
+
+    def _contribution(self, windows):
+        starts = self.window_starts
+        scores = self.window_scores
+        owners = self.owners
+        x_counts = self.counts['X']
+        o_counts = self.counts['O']
+        total = 0
+        for window in windows:
+            owner = owners[starts[window]]
+            if owner == 'X':
+                if not o_counts[window]:
+                    total += scores[x_counts[window]]
+            elif owner == 'O':
+                if not x_counts[window]:
+                    total -= scores[o_counts[window]]
+        return total
+
+    def _shaping_delta(self, windows, letter, opponent):
+        deltas = self.shaping_deltas
+        counts = self.counts[letter]
+        other_counts = self.counts[opponent]
+        own_shaping = 0
+        other_shaping = 0
+        for window in windows:
+            own_delta, other_delta = deltas[counts[window]][other_counts[window]]
+            own_shaping += own_delta
+            other_shaping += other_delta
+        return own_shaping, other_shaping
+
+    def add(self, row, col, letter):
+        cell = row * self.cols + col
+        windows = self.cell_windows[cell]
+        before = self._contribution(windows)
+        self.owners[cell] = letter
+        if self.shaping is not None:
+            opponent = 'O' if letter == 'X' else 'X'
+            own_shaping, other_shaping = self._shaping_delta(windows, letter, opponent)
+            self.shaping[letter] += own_shaping
+            self.shaping[opponent] += other_shaping
+            if col == self.cols // 2:
+                self.center_counts[letter] += 1
+        counts = self.counts[letter]
+        for window in windows:
+            counts[window] += 1
+        self.score += self._contribution(windows) - before
+
+    def remove(self, row, col, letter):
+        cell = row * self.cols + col
+        windows = self.cell_windows[cell]
+        before = self._contribution(windows)
+        self.owners[cell] = ' '
+        counts = self.counts[letter]
+        for window in windows:
+            counts[window] -= 1
+        if self.shaping is not None:
+            opponent = 'O' if letter == 'X' else 'X'
+            own_shaping, other_shaping = self._shaping_delta(windows, letter, opponent)
+            self.shaping[letter] -= own_shaping
+            self.shaping[opponent] -= other_shaping
+            if col == self.cols // 2:
+                self.center_counts[letter] -= 1
+        self.score += self._contribution(windows) - before
+
+    def evaluate(self, player):
+        return self.score if player == 'X' else -self.score
+
+    def start_shaping(self):
+        table = self.shaping_table
+        x_counts = self.counts['X']
+        o_counts = self.counts['O']
+        self.shaping = {
+            'X': sum(table[x][o] for x, o in zip(x_counts, o_counts)),
+            'O': sum(table[o][x] for x, o in zip(x_counts, o_counts))
+        }
+        center = [self.owners[row * self.cols + self.cols // 2] for row in range(self.rows)]
+        self.center_counts = {'X': center.count('X'), 'O': center.count('O')}
+
+    def shaping_score(self, player):
+        if self.shaping is None:
+            self.start_shaping()
+        return self.shaping[player] + self.center_counts[player] * SHAPING_CENTER_BONUS
+
 class Connect4:
-    def __init__(self, rows=6, cols=7):
+    def __init__(self, rows=6, cols=7, k=4):
         self.rows = rows
         self.cols = cols
+        self.k = k
+        self.geometry = board_geometry(rows, cols, k)
         self.board = [[' ' for _ in range(cols)] for _ in range(rows)]
         self.current_winner = None
+        self.zobrist = zobrist_keys(rows, cols)
+        self.hash = 0
+        self.evaluator = IncrementalEvaluator(rows, cols, k)
 
     def print_board(self):
         for row in self.board:
@@ -26,52 +150,236 @@ class Connect4:
         for row in reversed(range(self.rows)):
             if self.board[row][col] == ' ':
                 self.board[row][col] = letter
+                self.hash ^= self.zobrist[letter][col * self.rows + self.rows - 1 - row]
+                self.evaluator.add(row, col, letter)
                 if self.check_winner(row, col, letter):
                     self.current_winner = letter
                 return True
         return False
 
     def check_winner(self, row, col, letter):
+        k = self.k
         count = 0
-        for c in range(max(0, col-3), min(self.cols, col+4)):
+        for c in range(max(0, col-(k-1)), min(self.cols, col+k)):
             if self.board[row][c] == letter:
                 count += 1
-                if count == 4:
+                if count == k:
                     return True
             else:
                 count = 0
 
         count = 0
-        for r in range(max(0, row-3), min(self.rows, row+4)):
+        for r in range(max(0, row-(k-1)), min(self.rows, row+k)):
             if self.board[r][col] == letter:
                 count += 1
-                if count == 4:
+                if count == k:
                     return True
             else:
                 count = 0
 
         count = 0
-        for d in range(-3, 4):
+        for d in range(1 - k, k):
             r = row + d
             c = col + d
             if 0 <= r < self.rows and 0 <= c < self.cols:
                 if self.board[r][c] == letter:
                     count += 1
-                    if count == 4:
+                    if count == k:
                         return True
                 else:
                     count = 0
 
         count = 0
-        for d in range(-3, 4):
+        for d in range(1 - k, k):
             r = row + d
             c = col - d
             if 0 <= r < self.rows and 0 <= c < self.cols:
                 if self.board[r][c] == letter:
                     count += 1
-                    if count == 4:
+                    if count == k:
                         return True
                 else:
                     count = 0
 
-        return False
\ No newline at end of file
+        return False
+
+    def threats(self, letter):
+        opponent = 'O' if letter == 'X' else 'X'
+        own_counts = self.evaluator.counts[letter]
+        opponent_counts = self.evaluator.counts[opponent]
+        owners = self.evaluator.owners
+        lines = self.geometry.lines
+        needed = self.k - 1
+        cells = 0
+        for index, count in enumerate(own_counts):
+            if count == needed and not opponent_counts[index]:
+                for cell in lines[index]:
+                    if owners[cell] == ' ':
+                        cells |= 1 << cell
+                        break
+        return cells
+
+    def winning_moves(self, letter):
+        cells = self.threats(letter)
+        if not cells:
+            return []
+        moves = []
+        for col in self.available_moves():
+            row = self.rows - 1
+            while self.board[row][col] != ' ':
+                row -= 1
+            if cells >> (row * self.cols + col) & 1:
+                moves.append(col)
+        return moves
+
+    def position_key(self, player):
+        return self.hash ^ ZOBRIST_SIDE[player]
+
+    def undo_move(self, col):
+        for row in range(self.rows):
+            if self.board[row][col] != ' ':
+                self.hash ^= self.zobrist[self.board[row][col]][col * self.rows + self.rows - 1 - row]
+                self.evaluator.remove(row, col, self.board[row][col])
+                self.board[row][col] = ' '
+                self.current_winner = None
+                break
+
+class BitboardConnect4:
+    def __init__(self, rows=6, cols=7, k=4):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.geometry = board_geometry(rows, cols, k)
+        self.current_winner = None
+        self.stride = rows + 1
+        self.masks = {'X': 0, 'O': 0}
+        self.heights = [0] * cols
+        self.move_count = 0
+        self.bottom_mask = sum(1 << (c * self.stride) for c in range(cols))
+        self.board_mask = self.bottom_mask * ((1 << rows) - 1)
+        self.shifts = (1, self.stride, self.stride - 1, self.stride + 1)
+        self.line_steps = []
+        length = 1
+        while length < k:
+            step = min(length, k - length)
+            self.line_steps.append(step)
+            length += step
+        self.zobrist = zobrist_keys(rows, cols)
+        self.hash = 0
+        self._evaluator = None
+
+    @property
+    def board(self):
+        x_mask = self.masks['X']
+        o_mask = self.masks['O']
+        stride = self.stride
+        return [['X' if x_mask >> (col * stride + h) & 1 else 'O' if o_mask >> (col * stride + h) & 1 else ' '
+                 for col in range(self.cols)]
+                for h in range(self.rows - 1, -1, -1)]
+
+    # built on first use, so moves made by searches and probes that never evaluate skip the window updates
+    @property
+    def evaluator(self):
+        if self._evaluator is None:
+            evaluator = IncrementalEvaluator(self.rows, self.cols, self.k)
+            for row, cells in enumerate(self.board):
+                for col, letter in enumerate(cells):
+                    if letter != ' ':
+                        evaluator.add(row, col, letter)
+            self._evaluator = evaluator
+        return self._evaluator
+
+    def print_board(self):
+        for row in self.board:
+            print('| ' + ' | '.join(row) + ' |')
+        print('  ' + '   '.join(str(i) for i in range(self.cols)))
+
+    def occupied_mask(self):
+        return self.masks['X'] | self.masks['O']
+
+    def legal_moves_mask(self):
+        return (self.occupied_mask() + self.bottom_mask) & self.board_mask
+
+    def available_moves(self):
+        rows = self.rows
+        return [col for col, h in enumerate(self.heights) if h < rows]
+
+    def empty_squares(self):
+        return self.move_count < self.rows * self.cols
+
+    def make_move(self, col, letter):
+        h = self.heights[col]
+        if h >= self.rows:
+            return False
+        mask = self.masks[letter] | (1 << (col * self.stride + h))
+        self.masks[letter] = mask
+        self.heights[col] = h + 1
+        self.move_count += 1
+        self.hash ^= self.zobrist[letter][col * self.rows + h]
+        if self._evaluator is not None:
+            self._evaluator.add(self.rows - 1 - h, col, letter)
+        if self.has_line(mask):
+            self.current_winner = letter
+        return True
+
+    def position_key(self, player):
+        return self.hash ^ ZOBRIST_SIDE[player]
+
+    def undo_move(self, col):
+        h = self.heights[col] - 1
+        if h < 0:
+            return False
+        bit = 1 << (col * self.stride + h)
+        letter = 'X' if self.masks['X'] & bit else 'O'
+        self.masks[letter] ^= bit
+        self.heights[col] = h
+        self.move_count -= 1
+        self.hash ^= self.zobrist[letter][col * self.rows + h]
+        if self._evaluator is not None:
+            self._evaluator.remove(self.rows - 1 - h, col, letter)
+        self.current_winner = None
+        return True
+
+    def has_line(self, mask):
+        for shift in self.shifts:
+            run = mask
+            for step in self.line_steps:
+                run &= run >> (step * shift)
+            if run:
+                return True
+        return False
+
+    def check_winner(self, row, col, letter):
+        return self.has_line(self.masks[letter])
+
+    def threats(self, letter):
+        own = self.masks[letter]
+        k = self.k
+        cells = 0
+        for shift in self.shifts:
+            before = [-1]
+            after = [-1]
+            for step in range(1, k):
+                before.append(before[-1] & (own << (step * shift)))
+                after.append(after[-1] & (own >> (step * shift)))
+            for gap in range(k):
+                cells |= before[gap] & after[k - 1 - gap]
+        return cells & self.board_mask & ~self.occupied_mask()
+
+    def winning_moves(self, letter):
+        cells = self.threats(letter)
+        if not cells:
+            return []
+        stride = self.stride
+        return [col for col, h in enumerate(self.heights) if cells >> (col * stride + h) & 1]
+
+def game_from_board(board, game_class=BitboardConnect4, k=4):
+    rows = len(board)
+    cols = len(board[0])
+    game = game_class(rows, cols, k)
+    for col in range(cols):
+        for row in reversed(range(rows)):
+            if board[row][col] == ' ':
+                break
+            game.make_move(col, board[row][col])
+    return game
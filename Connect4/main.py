@@ -5,33 +5,41 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import csv
 
-from game import Connect4
-from algorithms import minimax, qlearning, baseline
+from game import BitboardConnect4
+from algorithms import minimax, qlearning, baseline, book
 from algorithms.minimax import get_states_explored
+from algorithms.game_records import GameRecordWriter
+from algorithms.results_log import ResultsLog, RunningStats, read_log
 
 def select_alpha_beta():
     response = input("Use alpha-beta pruning for minimax? (y/n): ").strip().lower()
     return response == 'y'
 
-def get_move(game, player_letter, algorithm, use_alpha_beta, depth=4, time_limit=1800):
+HUMAN_MOVE_TIME_MS = 2000
+
+def get_move(game, player_letter, algorithm, use_alpha_beta, depth=4, time_limit=1800, move_time_ms=None):
     if algorithm == "baseline":
         return baseline.baseline_move_connect4(game, player_letter)
     elif algorithm == "minimax":
         if use_alpha_beta:
-            move_info = minimax.minimax_connect4(game, player_letter, depth, -float('inf'), float('inf'),
-                                                 start_time=time.time(), time_limit=time_limit)
-            return move_info["position"]
-        else:
-            move_info = minimax.minimax_no_ab_connect4(game, player_letter, depth,
-                                                     start_time=time.time(), time_limit=time_limit)
-            return move_info["position"]
+            book_move = book.book_move(game, player_letter)
+            if book_move is not None:
+                return book_move
+        if move_time_ms is None:
+            move_time_ms = time_limit * 1000
+        move_info = minimax.iterative_deepening_connect4(game, player_letter, max_depth=depth,
+                                                         time_budget_ms=move_time_ms,
+                                                         use_alpha_beta=use_alpha_beta,
+                                                         ctx=minimax.get_default_context())
+        return move_info["position"]
     elif algorithm == "qlearning":
         return qlearning.q_learning_move_connect4(game, player_letter)
     else:
         return random.choice(game.available_moves())
 
-def play_game_matchup(matchup, use_alpha_beta, depth=4, time_limit=1800):
-    game = Connect4()
+def play_game_matchup(matchup, use_alpha_beta, depth=4, time_limit=1800, history=None):
+    game = BitboardConnect4()
+    minimax.new_game(game.cols)
     if matchup == "1":
         algo1 = "baseline"
         algo2 = "minimax"
@@ -71,9 +79,12 @@ def play_game_matchup(matchup, use_alpha_beta, depth=4, time_limit=1800):
                 
             start_time_move = time.time()
             move = get_move(game, player1_letter, algo1, use_alpha_beta, depth, time_limit)
-            algo1_time += time.time() - start_time_move
+            move_time = time.time() - start_time_move
+            algo1_time += move_time
             print(f"\n{algo1} chooses move: {move}")
             game.make_move(move, player1_letter)
+            if history is not None:
+                history.append((0, move, move_time))
             
             if game.current_winner == player1_letter:
                 print(f"{algo1} wins!")
@@ -90,9 +101,12 @@ def play_game_matchup(matchup, use_alpha_beta, depth=4, time_limit=1800):
                 
             start_time_move = time.time()
             move = get_move(game, player2_letter, algo2, use_alpha_beta, depth, time_limit)
-            algo2_time += time.time() - start_time_move
+            move_time = time.time() - start_time_move
+            algo2_time += move_time
             print(f"\n{algo2} chooses move: {move}")
             game.make_move(move, player2_letter)
+            if history is not None:
+                history.append((1, move, move_time))
             
             if game.current_winner == player2_letter:
                 print(f"{algo2} wins!")
@@ -106,7 +120,8 @@ def play_game_matchup(matchup, use_alpha_beta, depth=4, time_limit=1800):
     return algo1, algo2, "tie", algo1_time, algo2_time, moves_count
 
 def play_vs_human(ai_type, use_alpha_beta, depth=4):
-    game = Connect4()
+    game = BitboardConnect4()
+    minimax.new_game(game.cols)
     player_letter = 'X'
     ai_letter = 'O'
 
@@ -130,7 +145,7 @@ def play_vs_human(ai_type, use_alpha_beta, depth=4):
                     print("Invalid input. Enter a number between 0-6.")
         else:
             print("AI is thinking...")
-            move = get_move(game, ai_letter, ai_type, use_alpha_beta, depth)
+            move = get_move(game, ai_letter, ai_type, use_alpha_beta, depth, move_time_ms=HUMAN_MOVE_TIME_MS)
             game.make_move(move, ai_letter)
             print(f"AI placed in column {move}")
 
@@ -148,21 +163,24 @@ def play_vs_human(ai_type, use_alpha_beta, depth=4):
 
     print("It's a draw!")
 
-def save_results(results, parameters, algo1_times=None, algo2_times=None, moves_per_game=None, start_time=None, folder_prefix="connect4_results"):
+def results_folder(folder_prefix="connect4_results"):
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
     folder_name = f"{folder_prefix}_{now}"
     os.makedirs(folder_name, exist_ok=True)
-    
+    return folder_name
+
+def game_log_fields(player1_algo, player2_algo):
+    return ["Game Number", "Winner", f"{player1_algo} Score", f"{player2_algo} Score",
+            f"{player1_algo} Time (s)", f"{player2_algo} Time (s)", "Moves Count"]
+
+def save_results(folder_name, parameters, score_algo1, score_algo2, algo1_times, algo2_times, moves_per_game, start_time):
     csv_file = os.path.join(folder_name, "results.csv")
     file_exists = os.path.exists(csv_file)
     
-    total_games = len(results)
-    total_moves = sum(moves_per_game)
-    average_moves = total_moves / total_games if total_games > 0 else 0
-    avg_algo1_time = sum(algo1_times) / total_games if total_games > 0 else 0
-    avg_algo2_time = sum(algo2_times) / total_games if total_games > 0 else 0
-    score_algo1 = sum([1 for result in results if result[1] == parameters['player1_algo']])
-    score_algo2 = total_games - score_algo1  
+    total_games = moves_per_game.count
+    average_moves = moves_per_game.mean
+    avg_algo1_time = algo1_times.mean
+    avg_algo2_time = algo2_times.mean
 
     with open(csv_file, mode='a' if file_exists else 'w', newline='') as f:
         writer = csv.writer(f)
@@ -205,14 +223,18 @@ def save_results(results, parameters, algo1_times=None, algo2_times=None, moves_
         
         pf.write(f"\nOverall Statistics:\n")
         pf.write(f"Total games played: {total_games}\n")
-        pf.write(f"Average moves per game: {average_moves:.2f}\n")
-        pf.write(f"Average move time for {parameters['player1_algo']}: {avg_algo1_time:.6f} seconds\n")
-        pf.write(f"Average move time for {parameters['player2_algo']}: {avg_algo2_time:.6f} seconds\n")
+        pf.write(f"Average moves per game: {average_moves:.2f} (std {moves_per_game.std():.2f})\n")
+        pf.write(f"Average move time for {parameters['player1_algo']}: {avg_algo1_time:.6f} seconds "
+                 f"(std {algo1_times.std():.6f})\n")
+        pf.write(f"Average move time for {parameters['player2_algo']}: {avg_algo2_time:.6f} seconds "
+                 f"(std {algo2_times.std():.6f})\n")
     print(f"Parameters and statistics saved to {stats_file}")
     
-    games = list(range(1, total_games + 1))
-    algo1_scores = [score_algo1] * total_games
-    algo2_scores = [score_algo2] * total_games
+    fields = game_log_fields(parameters['player1_algo'], parameters['player2_algo'])
+    rows = list(read_log(os.path.join(folder_name, "games.csv")))
+    games = [row[fields[0]] for row in rows]
+    algo1_scores = [row[fields[2]] for row in rows]
+    algo2_scores = [row[fields[3]] for row in rows]
     
     plt.figure(figsize=(10, 6))
     plt.plot(games, algo1_scores, label=f"{parameters['player1_algo']} Score")
@@ -285,10 +307,9 @@ def main():
         else:
             player1_algo, player2_algo = "baseline", "minimax"
 
-        results = []
-        algo1_times = []
-        algo2_times = []
-        moves_per_game = []
+        algo1_times = RunningStats()
+        algo2_times = RunningStats()
+        moves_per_game = RunningStats()
         score_algo1 = 0
         score_algo2 = 0
         params = {
@@ -300,28 +321,42 @@ def main():
             "player2_algo": player2_algo
         }
 
+        folder_name = results_folder()
+        games_log = ResultsLog(os.path.join(folder_name, "games.csv"), game_log_fields(player1_algo, player2_algo))
+        game_records = GameRecordWriter(os.path.join(folder_name, "games.rec"))
         start_time = time.time()
-        for i in range(total_games):
-            print(f"\n🔁 Game {i+1}/{total_games}")
-            algo1_used, algo2_used, winner, algo1_time, algo2_time, moves_count = play_game_matchup(choice, use_alpha_beta, depth)
-            algo1_times.append(algo1_time)
-            algo2_times.append(algo2_time)
-            moves_per_game.append(moves_count)
+        with games_log, game_records:
+            for i in range(total_games):
+                print(f"\n🔁 Game {i+1}/{total_games}")
+                history = []
+                algo1_used, algo2_used, winner, algo1_time, algo2_time, moves_count = play_game_matchup(choice, use_alpha_beta, depth,
+                                                                                                        history=history)
+                algo1_times.add(algo1_time)
+                algo2_times.add(algo2_time)
+                moves_per_game.add(moves_count)
 
-            if winner == algo1_used:
-                score_algo1 += 1
-            elif winner == algo2_used:
-                score_algo2 += 1
+                if winner == algo1_used:
+                    score_algo1 += 1
+                elif winner == algo2_used:
+                    score_algo2 += 1
 
-            results.append([i+1, winner, score_algo1, score_algo2])
-            print(f"Score -> {player1_algo}: {score_algo1}, {player2_algo}: {score_algo2}")
+                games_log.write(dict(zip(games_log.fields, [i+1, winner, score_algo1, score_algo2,
+                                                            algo1_time, algo2_time, moves_count])))
+                if history:
+                    first = history[0][0]
+                    game_winner = 0 if winner == algo1_used else 1 if winner == algo2_used else None
+                    game_records.add_game(player1_algo, player2_algo, first, 'XO'[first], game_winner,
+                                          [move for _, move, _ in history], [seconds for _, _, seconds in history], i)
+                print(f"Score -> {player1_algo}: {score_algo1}, {player2_algo}: {score_algo2}")
 
         elapsed_time = time.time() - start_time
         print(f"\n📊 Session Complete!")
         print(f"⏱️ Total time: {elapsed_time:.2f}s")
         print(f"🏁 Final Score: {player1_algo}: {score_algo1}, {player2_algo}: {score_algo2}")
+        print(f"Per-game results saved to {games_log.path}")
+        print(f"Game records saved to {game_records.path}")
 
-        save_results(results, params, algo1_times, algo2_times, moves_per_game)
+        save_results(folder_name, params, score_algo1, score_algo2, algo1_times, algo2_times, moves_per_game, start_time)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
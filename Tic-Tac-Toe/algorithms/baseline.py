@@ -1,20 +1,12 @@
 import random
 
 def baseline_move(game, letter):
-    for move in game.available_moves():
-        game.make_move(move, letter)
-        if game.current_winner == letter:
-            game.board[move] = ' '
-            game.current_winner = None
-            return move
-        game.board[move] = ' '
-    
+    wins = game.winning_moves(letter)
+    if wins:
+        return wins[0]
+
     opponent = 'O' if letter == 'X' else 'X'
-    for move in game.available_moves():
-        game.make_move(move, opponent)
-        if game.current_winner == opponent:
-            game.board[move] = ' '
-            game.current_winner = None
-            return move
-        game.board[move] = ' '
+    blocks = game.winning_moves(opponent)
+    if blocks:
+        return blocks[0]
     return random.choice(game.available_moves())
\ No newline at end of file
@@ -0,0 +1,233 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from game import TicTacToe
+from algorithms import minimax, qlearning, baseline, solved_table
+from algorithms.minimax import SearchContext
+
+GAME = TicTacToe
+GAME_NAME = "Tic-Tac-Toe"
+GAME_ID = "tictactoe"
+# square sequences played alternately from an empty board, X first
+BENCH_POSITIONS = ("", "4", "0", "40", "04", "4031", "0481", "40862")
+MAX_TIME_TO_DEPTH = 9
+BENCH_CONFIG = {}
+TIME_TO_DEPTH_REPEAT = 3
+REPEAT = 10
+# cheap agents are timed over a batch of calls so timer overhead and jitter don't dominate
+FAST_CALLS = 100
+PERCENTILES = (50, 95, 99)
+COMPARED_LATENCIES = ("p50_ms", "p95_ms")
+REGRESSION_THRESHOLD = 0.25
+RESULTS_PATH = "benchmark_results.json"
+BASELINE_PATH = "benchmark_baseline.json"
+
+def bench_minimax(game, letter):
+    ctx = SearchContext()
+    start = time.perf_counter()
+    minimax.minimax(game, letter, ctx=ctx)
+    return time.perf_counter() - start, ctx.node_count
+
+def bench_minimax_no_ab(game, letter):
+    ctx = SearchContext()
+    start = time.perf_counter()
+    minimax.minimax_no_ab(game, letter, ctx=ctx)
+    return time.perf_counter() - start, ctx.node_count
+
+def bench_minimax_solved(game, letter):
+    minimax.USE_SOLVED_TABLE = True
+    try:
+        start = time.perf_counter()
+        for _ in range(FAST_CALLS):
+            minimax.minimax(game, letter)
+        return (time.perf_counter() - start) / FAST_CALLS, None
+    finally:
+        minimax.USE_SOLVED_TABLE = False
+
+def bench_baseline(game, letter):
+    start = time.perf_counter()
+    for _ in range(FAST_CALLS):
+        baseline.baseline_move(game, letter)
+    return (time.perf_counter() - start) / FAST_CALLS, None
+
+def bench_qlearning(game, letter):
+    qlearning.reset_episode()
+    start = time.perf_counter()
+    for _ in range(FAST_CALLS):
+        qlearning.q_learning_move(game, letter)
+    return (time.perf_counter() - start) / FAST_CALLS, None
+
+BENCHMARKS = {
+    "minimax": bench_minimax,
+    "minimax_no_ab": bench_minimax_no_ab,
+    "minimax_solved": bench_minimax_solved,
+    "baseline": bench_baseline,
+    "qlearning": bench_qlearning
+}
+
+def search_to_depth(game, letter, depth):
+    start = time.perf_counter()
+    minimax.minimax(game, letter, ctx=SearchContext(), depth=depth)
+    return time.perf_counter() - start
+
+@contextlib.contextmanager
+def isolated_agents():
+    saved = (qlearning.Q_table, set(qlearning.dirty_states), qlearning.EPSILON, qlearning.EPSILON_MIN,
+             minimax.USE_SOLVED_TABLE)
+    qlearning.Q_table = {}
+    qlearning.EPSILON = qlearning.EPSILON_MIN = 0.0
+    solved_table.get_table()
+    minimax.USE_SOLVED_TABLE = False
+    try:
+        yield
+    finally:
+        qlearning.Q_table, dirty_states, qlearning.EPSILON, qlearning.EPSILON_MIN, minimax.USE_SOLVED_TABLE = saved
+        qlearning.dirty_states.clear()
+        qlearning.dirty_states.update(dirty_states)
+        qlearning.reset_episode()
+
+# the rest of this module is kept identical in the Connect4 and Tic-Tac-Toe trees
+def load_position(moves):
+    game = GAME()
+    letter = 'X'
+    for move in moves:
+        if game.current_winner is not None or not game.empty_squares():
+            raise ValueError(f"Benchmark position '{moves}' is already finished")
+        game.make_move(int(move), letter)
+        letter = 'O' if letter == 'X' else 'X'
+    if game.current_winner is not None or not game.empty_squares():
+        raise ValueError(f"Benchmark position '{moves}' is already finished")
+    return game, letter
+
+def latency_summary(seconds, nodes):
+    ms = np.array(seconds) * 1000
+    summary = {"samples": len(ms), "mean_ms": float(ms.mean())}
+    for percentile, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+        summary[f"p{percentile}_ms"] = float(value)
+    if nodes:
+        summary["nodes"] = int(sum(nodes))
+        summary["nodes_per_second"] = sum(nodes) / sum(seconds)
+    return summary
+
+def run_benchmark(bench, repeat=REPEAT):
+    seconds = []
+    nodes = []
+    for _ in range(repeat):
+        for moves in BENCH_POSITIONS:
+            game, letter = load_position(moves)
+            elapsed, searched = bench(game, letter)
+            seconds.append(elapsed)
+            if searched is not None:
+                nodes.append(searched)
+    return latency_summary(seconds, nodes)
+
+def time_to_depth(max_depth=MAX_TIME_TO_DEPTH):
+    times = {}
+    for depth in range(1, max_depth + 1):
+        elapsed = []
+        for moves in BENCH_POSITIONS:
+            runs = []
+            for _ in range(TIME_TO_DEPTH_REPEAT):
+                game, letter = load_position(moves)
+                runs.append(search_to_depth(game, letter, depth))
+            elapsed.append(min(runs))
+        times[str(depth)] = 1000 * float(np.mean(elapsed))
+    return times
+
+def run_benchmarks(repeat=REPEAT, max_depth=MAX_TIME_TO_DEPTH):
+    with isolated_agents():
+        benchmarks = {}
+        for name, bench in BENCHMARKS.items():
+            benchmarks[name] = run_benchmark(bench, repeat)
+            print(f"[INFO] {name}: p50={benchmarks[name]['p50_ms']:.3f} ms")
+        times = time_to_depth(max_depth)
+    return {
+        "game": GAME_ID,
+        "python": platform.python_version(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "config": {"positions": list(BENCH_POSITIONS), "repeat": repeat, "max_time_to_depth": max_depth,
+                   "fast_calls": FAST_CALLS, **BENCH_CONFIG},
+        "benchmarks": benchmarks,
+        "time_to_depth_ms": times
+    }
+
+def compare(results, baseline_results, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+
+    def check(name, metric, current, previous, higher_is_better=False):
+        if higher_is_better:
+            worse = current * (1 + threshold) < previous
+        else:
+            worse = current > previous * (1 + threshold)
+        if worse:
+            regressions.append({"benchmark": name, "metric": metric, "baseline": previous, "current": current,
+                                "change": current / previous - 1 if previous else float('inf')})
+
+    for name, current in results["benchmarks"].items():
+        previous = baseline_results["benchmarks"].get(name)
+        if previous is None:
+            continue
+        for metric in COMPARED_LATENCIES:
+            check(name, metric, current[metric], previous[metric])
+        if "nodes_per_second" in current and "nodes_per_second" in previous:
+            check(name, "nodes_per_second", current["nodes_per_second"], previous["nodes_per_second"], True)
+            if current["nodes"] != previous["nodes"]:
+                print(f"[INFO] {name} searched {current['nodes']} nodes (baseline {previous['nodes']})")
+    for depth, current in results["time_to_depth_ms"].items():
+        previous = baseline_results["time_to_depth_ms"].get(depth)
+        if previous is not None:
+            check("time_to_depth", f"depth {depth}", current, previous)
+    return regressions
+
+def print_results(results):
+    for name, summary in results["benchmarks"].items():
+        line = (f"{name:>24}: p50={summary['p50_ms']:.3f}  p95={summary['p95_ms']:.3f}  "
+                f"p99={summary['p99_ms']:.3f} ms")
+        if "nodes_per_second" in summary:
+            line += f"  {summary['nodes']} nodes  {summary['nodes_per_second']:.0f} nodes/s"
+        print(line)
+    print("           time to depth: " + "  ".join(f"d{depth}={ms:.1f}ms"
+                                                  for depth, ms in results["time_to_depth_ms"].items()))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=f"Benchmark the {GAME_NAME} agents on fixed positions and compare "
+                                                 "against a stored baseline.")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per position")
+    parser.add_argument("--max-depth", type=int, default=MAX_TIME_TO_DEPTH, help="deepest search depth to time")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed slowdown before a metric counts as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+    results = run_benchmarks(args.repeat, args.max_depth)
+    print_results(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Results saved to {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[INFO] Baseline saved to {args.baseline}")
+    elif not os.path.exists(args.baseline):
+        print(f"[WARN] No baseline at {args.baseline}; run with --save-baseline to record one")
+    else:
+        with open(args.baseline) as f:
+            baseline_results = json.load(f)
+        if baseline_results.get("config") != results["config"]:
+            print(f"[WARN] {args.baseline} was recorded with different settings; skipping the comparison")
+        else:
+            regressions = compare(results, baseline_results, args.threshold)
+            for regression in regressions:
+                print(f"[WARN] Regression in {regression['benchmark']} {regression['metric']}: "
+                      f"{regression['baseline']:.3f} -> {regression['current']:.3f} ({regression['change']:+.0%})")
+            if regressions:
+                sys.exit(1)
+            print(f"[INFO] No regressions beyond {args.threshold:.0%} against {args.baseline}")
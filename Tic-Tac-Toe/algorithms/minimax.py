@@ -1,63 +1,146 @@
-def minimax(game, player, alpha=-float('inf'), beta=float('inf')):
-    max_player = 'O'
+import time
+
+from game import TicTacToe
+from algorithms import solved_table
+
+MAX_PLAYER = 'O'
+USE_SOLVED_TABLE = True
+DEPTH_LIMITED_WIN_BONUS = 1000000
+
+last_context = None
+
+class SearchContext:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.node_count = 0
+
+    def stats(self):
+        return {"nodes": self.node_count}
+
+def evaluate_board(game, player):
+    geometry = game.geometry
+    own = game.masks[player]
+    opponent = game.masks['X' if player == 'O' else 'O']
+    line_scores = geometry.line_scores
+    score = 0
+    for line_mask in geometry.line_masks:
+        own_line = own & line_mask
+        opponent_line = opponent & line_mask
+        if own_line and not opponent_line:
+            score += line_scores[bin(own_line).count("1")]
+        elif opponent_line and not own_line:
+            score -= line_scores[bin(opponent_line).count("1")]
+    return score
+
+def negamax(ctx, game, player, alpha=-float('inf'), beta=float('inf'), depth=None):
+    ctx.node_count += 1
     other_player = 'X' if player == 'O' else 'O'
-    
+
     if game.current_winner == other_player:
-        return {"position": None, "score": (len(game.available_moves()) + 1) if other_player == max_player else -1 * (len(game.available_moves()) + 1)}
+        score = len(game.available_moves()) + 1
+        if depth is not None:
+            score += DEPTH_LIMITED_WIN_BONUS
+        return -score, None
     elif not game.empty_squares():
-        return {"position": None, "score": 0}
-    
-    if player == max_player:
-        best = {"position": None, "score": -float('inf')}
-    else:
-        best = {"position": None, "score": float('inf')}
-    
+        return 0, None
+    elif depth == 0:
+        return evaluate_board(game, player), None
+
+    child_depth = None if depth is None else depth - 1
+    best_score = -float('inf')
+    best_move = None
     for possible_move in game.available_moves():
         game.make_move(possible_move, player)
-        sim_score = minimax(game, other_player, alpha, beta)
-        game.board[possible_move] = ' '
-        game.current_winner = None
-        sim_score["position"] = possible_move
-
-        if player == max_player:
-            if sim_score["score"] > best["score"]:
-                best = sim_score
-            alpha = max(alpha, best["score"])
-        else:
-            if sim_score["score"] < best["score"]:
-                best = sim_score
-            beta = min(beta, best["score"])
-        if beta <= alpha:
+        score = -negamax(ctx, game, other_player, -beta, -alpha, child_depth)[0]
+        game.undo_move(possible_move)
+
+        if score > best_score:
+            best_score = score
+            best_move = possible_move
+            if score > alpha:
+                alpha = score
+        if alpha >= beta:
             break
 
-    return best
+    return best_score, best_move
 
-def minimax_no_ab(game, player):
-    max_player = 'O'
+def negamax_no_ab(ctx, game, player):
+    ctx.node_count += 1
     other_player = 'X' if player == 'O' else 'O'
-    
+
     if game.current_winner == other_player:
-        return {"position": None, "score": (len(game.available_moves()) + 1) if other_player == max_player else -1 * (len(game.available_moves()) + 1)}
+        return -(len(game.available_moves()) + 1), None
     elif not game.empty_squares():
-        return {"position": None, "score": 0}
+        return 0, None
 
-    if player == max_player:
-        best = {"position": None, "score": -float('inf')}
-    else:
-        best = {"position": None, "score": float('inf')}
-    
+    best_score = -float('inf')
+    best_move = None
     for possible_move in game.available_moves():
         game.make_move(possible_move, player)
-        sim_score = minimax_no_ab(game, other_player)
-        game.board[possible_move] = ' '
-        game.current_winner = None
-        sim_score["position"] = possible_move
-
-        if player == max_player:
-            if sim_score["score"] > best["score"]:
-                best = sim_score
-        else:
-            if sim_score["score"] < best["score"]:
-                best = sim_score
-
-    return best
\ No newline at end of file
+        score = -negamax_no_ab(ctx, game, other_player)[0]
+        game.undo_move(possible_move)
+
+        if score > best_score:
+            best_score = score
+            best_move = possible_move
+
+    return best_score, best_move
+
+def _prepare_context(ctx):
+    global last_context
+    if ctx is None:
+        ctx = SearchContext()
+    ctx.reset()
+    last_context = ctx
+    return ctx
+
+def solved_lookup(game, player):
+    if not USE_SOLVED_TABLE:
+        return None
+    entry = solved_table.get_table().lookup(game, player)
+    if entry is None:
+        return None
+    score, move = entry
+    return {"position": move, "score": score if player == MAX_PLAYER else -score}
+
+def minimax(game, player, alpha=-float('inf'), beta=float('inf'), ctx=None, depth=None):
+    ctx = _prepare_context(ctx)
+    result = solved_lookup(game, player)
+    if result is not None:
+        return result
+    if player == MAX_PLAYER:
+        score, move = negamax(ctx, game, player, alpha, beta, depth)
+    else:
+        score, move = negamax(ctx, game, player, -beta, -alpha, depth)
+        score = -score
+    return {"position": move, "score": score}
+
+def minimax_no_ab(game, player, ctx=None):
+    ctx = _prepare_context(ctx)
+    result = solved_lookup(game, player)
+    if result is not None:
+        return result
+    score, move = negamax_no_ab(ctx, game, player)
+    return {"position": move, "score": score if player == MAX_PLAYER else -score}
+
+def get_states_explored():
+    return last_context.node_count if last_context is not None else 0
+
+def benchmark_board_sizes(sizes=((3, 3, 3), (4, 4, 3), (5, 5, 4), (6, 6, 4), (7, 7, 5)), depth=4):
+    results = []
+    for rows, cols, k in sizes:
+        game = TicTacToe(rows, cols, k)
+        ctx = SearchContext()
+        start = time.time()
+        negamax(ctx, game, 'X', depth=depth)
+        elapsed = time.time() - start
+        nodes_per_second = ctx.node_count / elapsed if elapsed > 0 else 0.0
+        results.append({"rows": rows, "cols": cols, "k": k, "lines": len(game.geometry.lines),
+                        "nodes": ctx.node_count, "elapsed": elapsed, "nodes_per_second": nodes_per_second})
+        print(f"[INFO] {rows}x{cols} k={k}: {ctx.node_count} nodes in {elapsed:.2f}s ({nodes_per_second:.0f} nodes/s)")
+    return results
+
+if __name__ == '__main__':
+    benchmark_board_sizes()
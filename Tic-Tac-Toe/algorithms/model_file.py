@@ -0,0 +1,170 @@
+import argparse
+import os
+import pickle
+import struct
+
+import numpy as np
+
+MODEL_MAGIC = b"TTTQTAB\0"
+MODEL_VERSION = 1
+# magic, version, cells, record count
+MODEL_HEADER = struct.Struct("<8sIIQ")
+CELL_DIGITS = {' ': 0, 'X': 1, 'O': 2}
+DIGIT_CELLS = (' ', 'X', 'O')
+# largest board whose state code, 3**cells * 2, still fits the u8 key
+MAX_CELLS = 39
+
+def check_cells(cells):
+    if cells > MAX_CELLS:
+        raise ValueError(f"A {cells}-cell board does not fit in a 64-bit state code "
+                         f"(the model format supports up to {MAX_CELLS} cells)")
+
+def state_code(state):
+    check_cells(len(state) - 2)
+    code = 0
+    for cell in state[:-2]:
+        code = code * 3 + CELL_DIGITS[cell]
+    return code * 2 + (state[-1] == 'O')
+
+def state_from_code(code, cells):
+    player = 'O' if code & 1 else 'X'
+    code >>= 1
+    board = []
+    for _ in range(cells):
+        code, digit = divmod(code, 3)
+        board.append(DIGIT_CELLS[digit])
+    return ''.join(reversed(board)) + ":" + player
+
+def is_model_file(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MODEL_MAGIC)) == MODEL_MAGIC
+    except OSError:
+        return False
+
+def state_arrays(states, cells):
+    keys = np.array([state_code(state) for state, _ in states], dtype="<u8")
+    values = np.full((len(states), cells), np.nan, dtype="<f4")
+    for row, (_, action_values) in enumerate(states):
+        for action, value in action_values.items():
+            values[row, action] = value
+    return keys, values
+
+def write_model(f, table):
+    if isinstance(table, MappedQTable):
+        cells = table.cells
+        keys, values = table.arrays()
+    else:
+        states = list(table.items())
+        cells = len(states[0][0]) - 2 if states else 0
+        check_cells(cells)
+        keys, values = state_arrays(states, cells)
+    order = np.argsort(keys, kind="stable")
+    f.write(MODEL_HEADER.pack(MODEL_MAGIC, MODEL_VERSION, cells, len(keys)))
+    f.write(keys[order].tobytes())
+    f.write(values[order].tobytes())
+
+def save_model_file(table, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        write_model(f, table)
+    os.replace(tmp_path, path)
+
+class MappedQTable:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, cells, count = MODEL_HEADER.unpack(f.read(MODEL_HEADER.size))
+        if magic != MODEL_MAGIC or version != MODEL_VERSION:
+            raise ValueError(f"{path} is not a version {MODEL_VERSION} Tic-Tac-Toe Q-table")
+        self.path = path
+        self.cells = cells
+        self.base_size = count
+        if count:
+            self.base_keys = np.memmap(path, dtype="<u8", mode="r", offset=MODEL_HEADER.size, shape=(count,))
+            self.base_values = np.memmap(path, dtype="<f4", mode="r", offset=MODEL_HEADER.size + 8 * count,
+                                         shape=(count, cells))
+        else:
+            self.base_keys = np.zeros(0, dtype="<u8")
+            self.base_values = np.zeros((0, cells), dtype="<f4")
+        self.overlay = {}
+        self.new_states = set()
+
+    def _base_row(self, state):
+        code = state_code(state)
+        index = int(np.searchsorted(self.base_keys, np.uint64(code)))
+        if index < self.base_size and int(self.base_keys[index]) == code:
+            return index
+        return -1
+
+    def _row_dict(self, index):
+        return {action: float(value) for action, value in enumerate(self.base_values[index]) if not np.isnan(value)}
+
+    def __contains__(self, state):
+        return state in self.overlay or self._base_row(state) >= 0
+
+    def __getitem__(self, state):
+        action_values = self.overlay.get(state)
+        if action_values is None:
+            index = self._base_row(state)
+            if index < 0:
+                raise KeyError(state)
+            action_values = self._row_dict(index)
+            self.overlay[state] = action_values
+        return action_values
+
+    def __setitem__(self, state, action_values):
+        if state not in self.overlay and self._base_row(state) < 0:
+            self.new_states.add(state)
+        self.overlay[state] = action_values
+
+    def get(self, state, default=None):
+        try:
+            return self[state]
+        except KeyError:
+            return default
+
+    def __len__(self):
+        return self.base_size + len(self.new_states)
+
+    def __iter__(self):
+        for code in self.base_keys:
+            yield state_from_code(int(code), self.cells)
+        yield from self.new_states
+
+    def keys(self):
+        return iter(self)
+
+    def items(self):
+        for state in self:
+            yield state, self[state]
+
+    def arrays(self):
+        keys, values = state_arrays(list(self.overlay.items()), self.cells)
+        if not self.base_size:
+            return keys, values
+        merged = np.array(self.base_values)
+        index = np.minimum(np.searchsorted(self.base_keys, keys), self.base_size - 1)
+        in_base = self.base_keys[index] == keys
+        merged[index[in_base]] = values[in_base]
+        return np.concatenate([self.base_keys, keys[~in_base]]), np.concatenate([merged, values[~in_base]])
+
+    def base_items(self):
+        for index, code in enumerate(self.base_keys):
+            yield state_from_code(int(code), self.cells), self._row_dict(index)
+
+def load_model_file(path):
+    return MappedQTable(path)
+
+def convert_pickle(pkl_path, out_path):
+    with open(pkl_path, "rb") as f:
+        table = pickle.load(f)
+    save_model_file(table, out_path)
+    print(f"[INFO] Converted {pkl_path} ({len(table)} states) to {out_path}")
+    return len(table)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert a pickled Tic-Tac-Toe Q-table to the binary model format.")
+    parser.add_argument("pkl_path")
+    parser.add_argument("out_path")
+    args = parser.parse_args()
+    convert_pickle(args.pkl_path, args.out_path)
@@ -0,0 +1,190 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from game import TicTacToe
+from algorithms import qlearning, baseline, minimax
+
+SYNC_EVERY_GAMES = 1000
+WIN_REWARD = 10
+DRAW_REWARD = 0
+
+def opponent_move(game, letter, opponent):
+    if opponent == "minimax":
+        return minimax.minimax(game, letter)["position"]
+    return baseline.baseline_move(game, letter)
+
+def play_training_game(opponent, visits):
+    game = TicTacToe()
+    q_letter = random.choice(('X', 'O'))
+    player = 'X'
+    while game.empty_squares():
+        if player == q_letter:
+            move = qlearning.q_learning_move(game, player)
+            visits[qlearning.last_state] = visits.get(qlearning.last_state, 0) + 1
+        else:
+            move = opponent_move(game, player, opponent)
+        game.make_move(move, player)
+        if game.current_winner is not None:
+            break
+        player = 'O' if player == 'X' else 'X'
+    if game.current_winner == q_letter:
+        reward = WIN_REWARD
+    elif game.current_winner is not None:
+        reward = -WIN_REWARD
+    else:
+        reward = DRAW_REWARD
+    qlearning.update_terminal(reward)
+    return reward
+
+def _worker_loop(conn, table, opponent, seed):
+    random.seed(seed)
+    qlearning.SAVE_FREQUENCY = 0
+    qlearning.Q_table = table
+    while True:
+        message = conn.recv()
+        if message[0] == "stop":
+            break
+        _, games, merged = message
+        if merged is not None:
+            for state, action_values in merged.items():
+                qlearning.Q_table[state] = dict(action_values)
+        qlearning.dirty_states.clear()
+        visits = {}
+        start = time.time()
+        rewards = [play_training_game(opponent, visits) for _ in range(games)]
+        conn.send({
+            "delta": qlearning.dirty_snapshot(),
+            "visits": visits,
+            "games": games,
+            "wins": sum(1 for reward in rewards if reward > 0),
+            "seconds": time.time() - start,
+            "pid": os.getpid()
+        })
+    conn.close()
+
+def merge_deltas(table, state_visits, reports):
+    weighted = {}
+    for state in set().union(*(report["delta"] for report in reports)):
+        prior_weight = state_visits.get(state, 0)
+        if prior_weight:
+            weighted[state] = {action: (prior_weight * value, prior_weight) for action, value in table.get(state, {}).items()}
+    for report in reports:
+        visits = report["visits"]
+        for state, action_values in report["delta"].items():
+            weight = max(visits.get(state, 0), 1)
+            sums = weighted.setdefault(state, {})
+            for action, value in action_values.items():
+                total, total_weight = sums.get(action, (0.0, 0))
+                sums[action] = (total + weight * value, total_weight + weight)
+    merged = {}
+    for state, sums in weighted.items():
+        merged[state] = {action: total / total_weight for action, (total, total_weight) in sums.items()}
+        table[state] = dict(merged[state])
+        qlearning.dirty_states.add(state)
+    for report in reports:
+        for state, count in report["visits"].items():
+            state_visits[state] = state_visits.get(state, 0) + count
+    return merged or None
+
+class ParallelTrainer:
+    def __init__(self, workers=None, opponent="baseline", sync_every=SYNC_EVERY_GAMES, seed=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.opponent = opponent
+        self.sync_every = sync_every
+        self.state_visits = {}
+        seed = seed if seed is not None else int(time.time())
+        table = dict(qlearning.Q_table.items())
+        context = multiprocessing.get_context()
+        self.connections = []
+        self.processes = []
+        for i in range(self.workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_loop, args=(child_conn, table, opponent, seed + i), daemon=True)
+            process.start()
+            child_conn.close()
+            self.connections.append(parent_conn)
+            self.processes.append(process)
+        self.merged = None
+
+    def train(self, games, verbose=True):
+        results = {"games": 0, "wins": 0, "rounds": 0, "per_worker": {}}
+        start = time.time()
+        while results["games"] < games:
+            remaining = games - results["games"]
+            shard = max(1, min(self.sync_every, -(-remaining // self.workers)))
+            for conn in self.connections:
+                conn.send(("play", shard, self.merged))
+            reports = [conn.recv() for conn in self.connections]
+            self.merged = merge_deltas(qlearning.Q_table, self.state_visits, reports)
+            for report in reports:
+                results["games"] += report["games"]
+                results["wins"] += report["wins"]
+                results["per_worker"][report["pid"]] = results["per_worker"].get(report["pid"], 0) + report["games"]
+                qlearning.save_Q_table_to_disk(games=report["games"])
+            results["rounds"] += 1
+        results["elapsed"] = time.time() - start
+        results["games_per_second"] = results["games"] / results["elapsed"] if results["elapsed"] > 0 else 0.0
+        results["win_rate"] = results["wins"] / results["games"] if results["games"] else 0.0
+        if verbose:
+            print(f"[INFO] {self.workers} workers: {results['games']} games vs {self.opponent} in {results['elapsed']:.1f}s "
+                  f"({results['games_per_second']:.1f} games/s, win rate {results['win_rate']:.2f}, "
+                  f"{len(qlearning.Q_table)} states)")
+        return results
+
+    def close(self):
+        for conn in self.connections:
+            try:
+                conn.send(("stop",))
+            except OSError:
+                pass
+        for process in self.processes:
+            process.join()
+        for conn in self.connections:
+            conn.close()
+        self.connections = []
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def benchmark(games=20000, worker_counts=None, opponent="baseline"):
+    if worker_counts is None:
+        cores = os.cpu_count() or 1
+        worker_counts = [n for n in (1, 2, 4, 8, 16, 32, 64) if n < cores] + [cores]
+    results = []
+    for workers in worker_counts:
+        qlearning.Q_table = {}
+        qlearning.dirty_states.clear()
+        with ParallelTrainer(workers, opponent) as trainer:
+            result = trainer.train(games, verbose=False)
+        results.append({"workers": workers, "seconds": result["elapsed"], "games": result["games"],
+                        "games_per_second": result["games_per_second"]})
+    for result in results:
+        result["speedup"] = result["games_per_second"] / results[0]["games_per_second"]
+        print(f"workers={result['workers']:>3}  time={result['seconds']:.2f}s  "
+              f"games={result['games']}  gps={result['games_per_second']:.1f}  speedup={result['speedup']:.2f}x")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the Tic-Tac-Toe Q-learner with parallel self-play workers.")
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--opponent", choices=("baseline", "minimax"), default="baseline")
+    parser.add_argument("--sync-every", type=int, default=SYNC_EVERY_GAMES)
+    parser.add_argument("--load", action="store_true")
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(args.games, opponent=args.opponent)
+    else:
+        if args.load:
+            qlearning.load_model()
+        with ParallelTrainer(args.workers, args.opponent, args.sync_every) as trainer:
+            trainer.train(args.games)
+        qlearning.save_model()
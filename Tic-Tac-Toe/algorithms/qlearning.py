@@ -1,8 +1,12 @@
 import random
 import pickle
-import time
+import os
+
+from algorithms.checkpoint import CheckpointWriter
+from algorithms.model_file import is_model_file, load_model_file, save_model_file, write_model
 
 Q_table = {}
+dirty_states = set()
 last_state = None
 last_action = None
 
@@ -11,31 +15,47 @@ GAMMA = 0.9
 EPSILON = 0.7
 EPSILON_MIN = 0.1
 EPSILON_DECAY = 0.999
+MODEL_PATH = "qlearning_model.qtab"
+LEGACY_MODEL_PATH = "qlearning_model.pkl"
 SAVE_FREQUENCY = 1000
-
-game_counter = 0
-last_save_time = time.time()
+MAX_BACKUPS = 5
+BACKUP_EVERY = 10
+checkpoint_writer = None
 
 def state_str(game, player):
     return ''.join(game.board) + ":" + player
 
-def save_Q_table_to_disk():
-    global Q_table
-    with open("qlearning_model.pkl", "wb") as f:
-        pickle.dump(Q_table, f)
-    print("[INFO] Q-table saved to qlearning_model.pkl")
+def get_checkpoint_writer():
+    global checkpoint_writer
+    if checkpoint_writer is None:
+        checkpoint_writer = CheckpointWriter(MODEL_PATH, SAVE_FREQUENCY, MAX_BACKUPS, BACKUP_EVERY, delta=True,
+                                             serializer=write_model)
+    return checkpoint_writer
+
+def dirty_snapshot():
+    snapshot = {state: dict(Q_table[state]) for state in dirty_states}
+    dirty_states.clear()
+    return snapshot
+
+def save_Q_table_to_disk(force=False, games=1):
+    writer = get_checkpoint_writer()
+    if force:
+        writer.submit(dirty_snapshot())
+    else:
+        writer.game_finished(dirty_snapshot, games)
 
 def q_learning_move(game, player):
-    global Q_table, last_state, last_action, EPSILON, game_counter
+    global Q_table, last_state, last_action, EPSILON
 
     current_state = state_str(game, player)
     available_moves = game.available_moves()
 
     if current_state not in Q_table:
         Q_table[current_state] = {move: 0.0 for move in available_moves}
+        dirty_states.add(current_state)
 
     if random.random() < EPSILON:
-        center = 4
+        center = game.geometry.center()
         if center in available_moves and random.random() < 0.7:
             action = center
         else:
@@ -48,15 +68,12 @@ def q_learning_move(game, player):
         old_q = Q_table[last_state].get(last_action, 0.0)
         reward = 0
         Q_table[last_state][last_action] = old_q + ALPHA * (reward + GAMMA * future_q - old_q)
+        dirty_states.add(last_state)
 
     last_state = current_state
     last_action = action
     EPSILON = max(EPSILON * EPSILON_DECAY, EPSILON_MIN)
 
-    game_counter += 1
-    if game_counter % SAVE_FREQUENCY == 0:
-        save_Q_table_to_disk()
-
     return action
 
 def update_terminal(reward):
@@ -64,6 +81,8 @@ def update_terminal(reward):
     if last_state is not None and last_action is not None:
         old_q = Q_table[last_state].get(last_action, 0.0)
         Q_table[last_state][last_action] = old_q + ALPHA * (reward - old_q)
+        dirty_states.add(last_state)
+    save_Q_table_to_disk()
     reset_episode()
 
 def reset_episode():
@@ -71,16 +90,25 @@ def reset_episode():
     last_state = None
     last_action = None
 
-def save_model(filename="qlearning_model.pkl"):
-    with open(filename, "wb") as f:
-        pickle.dump(Q_table, f)
+def save_model(filename=MODEL_PATH):
+    if checkpoint_writer is not None:
+        checkpoint_writer.flush()
+    save_model_file(Q_table, filename)
     print(f"[INFO] Q-learning model saved to {filename}")
 
-def load_model(filename="qlearning_model.pkl"):
+def load_model(filename=MODEL_PATH):
     global Q_table
+    if filename == MODEL_PATH and not os.path.exists(filename) and os.path.exists(LEGACY_MODEL_PATH):
+        filename = LEGACY_MODEL_PATH
     try:
-        with open(filename, "rb") as f:
-            Q_table = pickle.load(f)
+        dirty_states.clear()
+        if is_model_file(filename):
+            Q_table = load_model_file(filename)
+            get_checkpoint_writer().set_base(Q_table.base_items)
+        else:
+            with open(filename, "rb") as f:
+                Q_table = pickle.load(f)
+            dirty_states.update(Q_table)
         print(f"[INFO] Q-learning model loaded from {filename}")
     except FileNotFoundError:
-        print("[WARN] No saved Q-table found. Starting fresh.")
\ No newline at end of file
+        print("[WARN] No saved Q-table found. Starting fresh.")
@@ -0,0 +1,122 @@
+import csv
+import json
+import math
+import os
+import time
+
+# the rest of this module is kept identical in the Connect4 and Tic-Tac-Toe trees
+FSYNC_EVERY_ROWS = 1000
+FSYNC_EVERY_SECONDS = 5.0
+
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+    def summary(self):
+        return {"count": self.count, "mean": self.mean, "variance": self.variance(), "std": self.std(),
+                "min": self.minimum, "max": self.maximum}
+
+def log_format(path):
+    return "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+
+def parse_field(text):
+    if text == "":
+        return None
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+def drop_partial_line(path):
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            step = min(1 << 16, position)
+            position -= step
+            f.seek(position)
+            newline = f.read(step).rfind(b"\n")
+            if newline >= 0:
+                if position + newline + 1 < end:
+                    f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+
+def read_log(path):
+    if not os.path.exists(path):
+        return
+    with open(path, newline="") as f:
+        lines = (line for line in f if line.endswith("\n"))
+        if log_format(path) == "jsonl":
+            for line in lines:
+                yield json.loads(line)
+        else:
+            for row in csv.DictReader(lines):
+                yield {key: parse_field(value) for key, value in row.items()}
+
+class ResultsLog:
+    def __init__(self, path, fields, resume=False, fsync_every=FSYNC_EVERY_ROWS, fsync_seconds=FSYNC_EVERY_SECONDS):
+        self.path = path
+        self.fields = list(fields)
+        self.format = log_format(path)
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        if resume and os.path.exists(path):
+            drop_partial_line(path)
+        has_rows = resume and os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "a" if resume else "w", newline="")
+        self._writer = None
+        if self.format == "csv":
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction="ignore")
+            if not has_rows:
+                self._writer.writeheader()
+        self.rows = 0
+        self._unsynced = 0
+        self._last_sync = time.time()
+
+    def write(self, record):
+        if self._writer is not None:
+            self._writer.writerow(record)
+        else:
+            self._file.write(json.dumps({field: record.get(field) for field in self.fields}) + "\n")
+        self.rows += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.time() - self._last_sync >= self.fsync_seconds:
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.time()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,263 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from geometry import board_geometry
+from algorithms import qlearning
+from algorithms.model_file import MappedQTable, check_cells, state_code
+
+CELL_VALUES = {' ': 0, 'X': 1, 'O': -1}
+CELL_CHARS = np.frombuffer(b" XO", dtype=np.uint8)
+WIN_REWARD = 10.0
+DRAW_REWARD = 0.0
+CENTER_BIAS = 0.7
+TABLE_CAPACITY = 4096
+
+class BatchTicTacToe:
+    def __init__(self, batch_size, rows=3, cols=3, k=None, seed=None):
+        self.batch_size = batch_size
+        self.geometry = board_geometry(rows, cols, k if k is not None else min(rows, cols))
+        self.cells = self.geometry.cells
+        self.lines = np.array(self.geometry.lines, dtype=np.intp)
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((batch_size, self.cells), dtype=np.int8)
+        self.to_move = np.ones(batch_size, dtype=np.int8)
+        self.reset()
+
+    def reset(self, games=None):
+        if games is None:
+            games = np.arange(self.batch_size)
+        self.boards[games] = 0
+        self.to_move[games] = np.where(self.rng.random(len(games)) < 0.5, CELL_VALUES['X'], CELL_VALUES['O'])
+
+    def legal_moves(self, games):
+        return self.boards[games] == 0
+
+    def step(self, games, actions):
+        values = self.to_move[games]
+        self.boards[games, actions] = values
+        boards = self.boards[games]
+        won = (boards[:, self.lines] == values[:, np.newaxis, np.newaxis]).all(axis=2).any(axis=1)
+        full = (boards != 0).all(axis=1)
+        self.to_move[games] = -values
+        return won, full & ~won
+
+# rows keyed by the model file's base-3 state code, with NaN for actions the dict table would not hold
+class BatchQTable:
+    def __init__(self, cells, capacity=TABLE_CAPACITY):
+        check_cells(cells)
+        self.cells = cells
+        self.powers = np.uint64(3) ** np.arange(cells - 1, -1, -1, dtype=np.uint64)
+        self.codes = np.zeros(capacity, dtype=np.uint64)
+        self.values = np.full((capacity, cells), np.nan, dtype=np.float32)
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        self.sorted_codes = np.zeros(0, dtype=np.uint64)
+        self.sorted_rows = np.zeros(0, dtype=np.intp)
+
+    def state_codes(self, boards, value):
+        codes = ((boards % 3).astype(np.uint64) * self.powers).sum(axis=1, dtype=np.uint64)
+        return codes * np.uint64(2) + np.uint64(value == CELL_VALUES['O'])
+
+    def state_strs(self, codes):
+        boards = (codes[:, np.newaxis] >> np.uint64(1)) // self.powers % np.uint64(3)
+        chars = CELL_CHARS[boards]
+        return [row.tobytes().decode() + (":O" if code & 1 else ":X") for row, code in zip(chars, codes.tolist())]
+
+    def find(self, codes):
+        if not len(self.sorted_codes):
+            return np.full(len(codes), -1, dtype=np.intp)
+        index = np.minimum(np.searchsorted(self.sorted_codes, codes), len(self.sorted_codes) - 1)
+        return np.where(self.sorted_codes[index] == codes, self.sorted_rows[index], -1)
+
+    def _grow(self, needed):
+        capacity = len(self.codes)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == len(self.codes):
+            return
+        codes = np.zeros(capacity, dtype=np.uint64)
+        values = np.full((capacity, self.cells), np.nan, dtype=np.float32)
+        dirty = np.zeros(capacity, dtype=bool)
+        codes[:self.size] = self.codes[:self.size]
+        values[:self.size] = self.values[:self.size]
+        dirty[:self.size] = self.dirty[:self.size]
+        self.codes, self.values, self.dirty = codes, values, dirty
+
+    def set_rows(self, codes, values, dirty=True):
+        codes, first = np.unique(codes, return_index=True)
+        values = values[first]
+        rows = self.find(codes)
+        known = rows >= 0
+        self.values[rows[known]] = values[known]
+        self.dirty[rows[known]] = dirty
+        codes = codes[~known]
+        if not len(codes):
+            return
+        self._grow(self.size + len(codes))
+        rows = np.arange(self.size, self.size + len(codes))
+        self.codes[rows] = codes
+        self.values[rows] = values[~known]
+        self.dirty[rows] = dirty
+        self.size += len(codes)
+        positions = np.searchsorted(self.sorted_codes, codes)
+        self.sorted_codes = np.insert(self.sorted_codes, positions, codes)
+        self.sorted_rows = np.insert(self.sorted_rows, positions, rows)
+
+    def rows_for(self, codes, legal):
+        rows = self.find(codes)
+        missing = rows < 0
+        if missing.any():
+            self.set_rows(codes[missing], np.where(legal[missing], 0.0, np.nan).astype(np.float32))
+            rows[missing] = self.find(codes[missing])
+        return rows
+
+    # games sharing a (row, action) compound in batch order, as if each update were applied in turn
+    def update(self, rows, actions, targets, alpha):
+        keys = rows * self.cells + actions
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        rows = rows[order]
+        actions = actions[order]
+        targets = targets[order]
+        new_group = np.empty(len(keys), dtype=bool)
+        new_group[0] = True
+        np.not_equal(keys[1:], keys[:-1], out=new_group[1:])
+        if new_group.all():
+            counts = 1
+            learned = alpha * targets
+        else:
+            starts = np.flatnonzero(new_group)
+            counts = np.diff(np.append(starts, len(keys)))
+            group = np.cumsum(new_group) - 1
+            later = counts[group] - 1 - (np.arange(len(keys)) - starts[group])
+            learned = np.bincount(group, alpha * (1 - alpha) ** later * targets)
+            rows = rows[starts]
+            actions = actions[starts]
+        old = self.values[rows, actions]
+        old[np.isnan(old)] = 0.0
+        self.values[rows, actions] = (1 - alpha) ** counts * old + learned
+        self.dirty[rows] = True
+
+    def load(self, table):
+        if isinstance(table, MappedQTable):
+            if table.cells == self.cells and table.base_size:
+                self.set_rows(np.asarray(table.base_keys, dtype=np.uint64),
+                              np.asarray(table.base_values, dtype=np.float32), dirty=False)
+            items = table.overlay.items()
+        else:
+            items = table.items()
+        states = [(state, action_values) for state, action_values in items if len(state) - 2 == self.cells]
+        if not states:
+            return
+        values = np.full((len(states), self.cells), np.nan, dtype=np.float32)
+        for row, (_, action_values) in enumerate(states):
+            for action, value in action_values.items():
+                values[row, action] = value
+        self.set_rows(np.array([state_code(state) for state, _ in states], dtype=np.uint64), values, dirty=False)
+
+    def sync(self, table, dirty_states):
+        rows = np.flatnonzero(self.dirty[:self.size])
+        if not len(rows):
+            return
+        states = self.state_strs(self.codes[rows])
+        for state, row_values in zip(states, self.values[rows].tolist()):
+            table[state] = {action: value for action, value in enumerate(row_values) if not math.isnan(value)}
+        dirty_states.update(states)
+        self.dirty[rows] = False
+
+class BatchQLearner:
+    def __init__(self, env, table):
+        self.env = env
+        self.table = table
+        self.last_rows = {value: np.full(env.batch_size, -1, dtype=np.intp) for value in (1, -1)}
+        self.last_actions = {value: np.zeros(env.batch_size, dtype=np.intp) for value in (1, -1)}
+
+    def select(self, games, value):
+        env = self.env
+        table = self.table
+        rng = env.rng
+        legal = env.legal_moves(games)
+        noise = rng.random(legal.shape)
+        noise[~legal] = -1.0
+        random_moves = noise.argmax(axis=1)
+        center = env.geometry.center()
+        explore = rng.random(len(games)) < qlearning.EPSILON
+        use_center = explore & legal[:, center] & (rng.random(len(games)) < CENTER_BIAS)
+        explore_moves = np.where(use_center, center, random_moves)
+        rows = table.rows_for(table.state_codes(env.boards[games], value), legal)
+        action_values = table.values[rows]
+        known = ~np.isnan(action_values)
+        action_values = np.where(known, action_values, -np.inf)
+        actions = np.where(explore, explore_moves, action_values.argmax(axis=1))
+        future_q = np.where(known.any(axis=1), action_values.max(axis=1), 0.0)
+        last_rows = self.last_rows[value][games]
+        played = last_rows >= 0
+        if played.any():
+            table.update(last_rows[played], self.last_actions[value][games[played]],
+                         qlearning.GAMMA * future_q[played], qlearning.ALPHA)
+        self.last_rows[value][games] = rows
+        self.last_actions[value][games] = actions
+        qlearning.EPSILON = max(qlearning.EPSILON * qlearning.EPSILON_DECAY ** len(games), qlearning.EPSILON_MIN)
+        return actions
+
+    def finish(self, games, value, rewards):
+        last_rows = self.last_rows[value][games]
+        played = last_rows >= 0
+        if played.any():
+            self.table.update(last_rows[played], self.last_actions[value][games[played]], rewards[played],
+                              qlearning.ALPHA)
+        self.last_rows[value][games] = -1
+
+def train_selfplay(games, batch_size=256, rows=3, cols=3, k=None, seed=None, verbose=True):
+    env = BatchTicTacToe(batch_size, rows, cols, k, seed)
+    table = BatchQTable(env.cells)
+    table.load(qlearning.Q_table)
+    learner = BatchQLearner(env, table)
+
+    def snapshot():
+        table.sync(qlearning.Q_table, qlearning.dirty_states)
+        return qlearning.dirty_snapshot()
+
+    results = {"games": 0, "x_wins": 0, "o_wins": 0, "draws": 0, "moves": 0}
+    start = time.time()
+    all_games = np.arange(batch_size)
+    while results["games"] < games:
+        for value in (CELL_VALUES['X'], CELL_VALUES['O']):
+            movers = all_games[env.to_move == value]
+            if not len(movers):
+                continue
+            actions = learner.select(movers, value)
+            won, drawn = env.step(movers, actions)
+            results["moves"] += len(movers)
+            finished = movers[won | drawn]
+            if len(finished):
+                rewards = np.where(won[won | drawn], WIN_REWARD, DRAW_REWARD)
+                learner.finish(finished, value, rewards)
+                learner.finish(finished, -value, -rewards)
+                results["x_wins" if value == CELL_VALUES['X'] else "o_wins"] += int(won.sum())
+                results["draws"] += int(drawn.sum())
+                env.reset(finished)
+                qlearning.get_checkpoint_writer().game_finished(snapshot, len(finished))
+                results["games"] += len(finished)
+    table.sync(qlearning.Q_table, qlearning.dirty_states)
+    results["elapsed"] = time.time() - start
+    results["games_per_second"] = results["games"] / results["elapsed"] if results["elapsed"] > 0 else 0.0
+    if verbose:
+        print(f"[INFO] {results['games']} self-play games in {results['elapsed']:.1f}s "
+              f"({results['games_per_second']:.0f} games/s, {len(qlearning.Q_table)} states)")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the Tic-Tac-Toe Q-learner with batched self-play.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--load", action="store_true")
+    args = parser.parse_args()
+    if args.load:
+        qlearning.load_model()
+    train_selfplay(args.games, args.batch_size, seed=args.seed)
+    qlearning.save_model()
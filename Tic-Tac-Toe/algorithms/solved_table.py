@@ -0,0 +1,92 @@
+import os
+from array import array
+
+from game import TicTacToe
+
+TABLE_MAGIC = b"TTTSOLV1"
+TABLE_PATH = "minimax_solved_table.bin"
+TABLE_SHAPE = (3, 3, 3)
+TABLE_SIZE = 2 * 3 ** 9
+NO_MOVE = -1
+MASK_CODES = tuple(sum(3 ** (8 - i) for i in range(9) if mask >> i & 1) for mask in range(1 << 9))
+
+_table = None
+
+def game_key(game, player):
+    return (MASK_CODES[game.masks['X']] + 2 * MASK_CODES[game.masks['O']]) * 2 + (player == 'O')
+
+class SolvedTable:
+    def __init__(self, scores, moves):
+        self.scores = scores
+        self.moves = moves
+
+    def lookup(self, game, player):
+        if game.current_winner is not None or (game.rows, game.cols, game.k) != TABLE_SHAPE:
+            return None
+        key = game_key(game, player)
+        move = self.moves[key]
+        if move == NO_MOVE:
+            return None
+        return self.scores[key], move
+
+def _solve(game, player, scores, moves):
+    key = game_key(game, player)
+    if moves[key] != NO_MOVE:
+        return scores[key]
+    other_player = 'X' if player == 'O' else 'O'
+    best_score = None
+    best_move = NO_MOVE
+    for possible_move in game.available_moves():
+        game.make_move(possible_move, player)
+        if game.current_winner == player:
+            score = len(game.available_moves()) + 1
+        elif not game.empty_squares():
+            score = 0
+        else:
+            score = -_solve(game, other_player, scores, moves)
+        game.undo_move(possible_move)
+        if best_score is None or score > best_score:
+            best_score = score
+            best_move = possible_move
+    scores[key] = best_score
+    moves[key] = best_move
+    return best_score
+
+def build_table():
+    scores = array('b', bytes(TABLE_SIZE))
+    moves = array('b', [NO_MOVE]) * TABLE_SIZE
+    for first_player in ('X', 'O'):
+        _solve(TicTacToe(), first_player, scores, moves)
+    return SolvedTable(scores, moves)
+
+def save_table(table, path=TABLE_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(TABLE_MAGIC)
+        f.write(table.scores.tobytes())
+        f.write(table.moves.tobytes())
+    os.replace(tmp_path, path)
+
+def load_table(path=TABLE_PATH):
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(TABLE_MAGIC)] != TABLE_MAGIC or len(data) != len(TABLE_MAGIC) + 2 * TABLE_SIZE:
+        return None
+    scores = array('b')
+    scores.frombytes(data[len(TABLE_MAGIC):len(TABLE_MAGIC) + TABLE_SIZE])
+    moves = array('b')
+    moves.frombytes(data[len(TABLE_MAGIC) + TABLE_SIZE:])
+    return SolvedTable(scores, moves)
+
+def get_table(path=TABLE_PATH):
+    global _table
+    if _table is None:
+        if os.path.exists(path):
+            _table = load_table(path)
+        if _table is None:
+            _table = build_table()
+            try:
+                save_table(_table, path)
+            except OSError:
+                print(f"[WARN] Could not cache solved table to {path}")
+    return _table
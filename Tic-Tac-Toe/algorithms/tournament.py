@@ -0,0 +1,342 @@
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from game import TicTacToe
+from algorithms.game_records import GameRecordWriter, GameRecords, agent_id
+from algorithms.results_log import ResultsLog, RunningStats, read_log
+from algorithms import minimax, qlearning, baseline, solved_table
+
+GAME = TicTacToe
+GAME_NAME = "Tic-Tac-Toe"
+AGENT_OPTIONS = {
+    "baseline": (),
+    "random": (),
+    "minimax": ("depth", "alpha_beta"),
+    "qlearning": ("model", "epsilon")
+}
+AGENT_EXAMPLES = ("minimax:alpha_beta=false, minimax:depth=2, qlearning:model=qlearning_model.qtab,epsilon=0, "
+                  "baseline, random")
+DEFAULT_GAMES = 10000
+
+baseline_move = baseline.baseline_move
+q_learning_move = qlearning.q_learning_move
+update_terminal = qlearning.update_terminal
+reset_episode = qlearning.reset_episode
+
+class MinimaxPlayer:
+    def __init__(self, params):
+        self.params = params
+        self.ctx = minimax.SearchContext()
+        if minimax.USE_SOLVED_TABLE:
+            solved_table.get_table()
+
+    def new_game(self):
+        pass
+
+    def move(self, game, letter):
+        if self.params.get("alpha_beta", True):
+            return minimax.minimax(game, letter, ctx=self.ctx, depth=self.params.get("depth"))["position"]
+        return minimax.minimax_no_ab(game, letter, ctx=self.ctx)["position"]
+
+# the rest of this module is kept identical in the Connect4 and Tic-Tac-Toe trees
+WIN_REWARD = 10
+LOG_FIELDS = ("pair", "game", "agent_a", "agent_b", "first", "winner", "moves", "time_a", "time_b")
+CHUNKS_PER_WORKER = 8
+
+_agents = {}
+_records = None
+_recorded = None
+
+def parse_value(text):
+    lowered = text.lower()
+    if lowered in ("true", "yes", "on"):
+        return True
+    if lowered in ("false", "no", "off"):
+        return False
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+def parse_agent(spec):
+    name, _, options = spec.partition(":")
+    if name not in AGENT_OPTIONS:
+        raise ValueError(f"Unknown agent '{name}' (expected one of {', '.join(AGENT_OPTIONS)})")
+    params = {}
+    for option in filter(None, options.split(",")):
+        key, sep, value = option.partition("=")
+        if not sep or key not in AGENT_OPTIONS[name]:
+            raise ValueError(f"Invalid option '{option}' for {name} (expected key=value with key in "
+                             f"{', '.join(AGENT_OPTIONS[name]) or 'nothing'})")
+        params[key] = parse_value(value)
+    return name, params
+
+class Agent:
+    def __init__(self, spec):
+        self.spec = spec
+        self.name, self.params = parse_agent(spec)
+        self.player = None
+        self.table = None
+        if self.name == "minimax":
+            self.player = MinimaxPlayer(self.params)
+        elif self.name == "qlearning":
+            qlearning.load_model(self.params.get("model", qlearning.MODEL_PATH))
+            self.table = qlearning.Q_table
+
+    def new_game(self):
+        if self.player is not None:
+            self.player.new_game()
+        elif self.table is not None:
+            reset_episode()
+
+    def move(self, game, letter):
+        if self.name == "baseline":
+            return baseline_move(game, letter)
+        if self.player is not None:
+            return self.player.move(game, letter)
+        if self.name == "qlearning":
+            qlearning.Q_table = self.table
+            if "epsilon" in self.params:
+                qlearning.EPSILON = qlearning.EPSILON_MIN = self.params["epsilon"]
+            return q_learning_move(game, letter)
+        return random.choice(game.available_moves())
+
+    def finish(self, reward):
+        if self.table is not None:
+            qlearning.Q_table = self.table
+            update_terminal(reward)
+
+def get_agent(spec):
+    agent = _agents.get(spec)
+    if agent is None:
+        agent = Agent(spec)
+        _agents[spec] = agent
+    return agent
+
+def play_game(agents, first):
+    game = GAME()
+    letters = {first: 'X', 1 - first: 'O'}
+    times = [0.0, 0.0]
+    history = []
+    think_times = []
+    turn = first
+    for agent in agents:
+        agent.new_game()
+    while game.empty_squares():
+        start = time.perf_counter()
+        move = agents[turn].move(game, letters[turn])
+        elapsed = time.perf_counter() - start
+        times[turn] += elapsed
+        game.make_move(move, letters[turn])
+        history.append(move)
+        think_times.append(elapsed)
+        if game.current_winner is not None:
+            break
+        turn = 1 - turn
+    winner = turn if game.current_winner is not None else None
+    for i, agent in enumerate(agents):
+        agent.finish(0 if winner is None else WIN_REWARD if winner == i else -WIN_REWARD)
+    return {"first": first, "winner": winner, "moves": len(history), "time_a": times[0], "time_b": times[1],
+            "history": history, "think_times": think_times}
+
+def _init_worker(records_path=None, recorded=None):
+    global _records, _recorded
+    sys.stdout = open(os.devnull, "w")
+    qlearning.SAVE_FREQUENCY = 0
+    if records_path:
+        _records = GameRecordWriter(records_path)
+    _recorded = recorded
+
+def _play_chunk(task):
+    pair_index, specs, seed, game_indices = task
+    agents = [get_agent(spec) for spec in specs]
+    records = []
+    for game_index in game_indices:
+        random.seed(f"{seed}:{pair_index}:{game_index}")
+        record = play_game(agents, game_index % 2)
+        history = record.pop("history")
+        think_times = record.pop("think_times")
+        if _records is not None and not (_recorded and game_index in _recorded[pair_index]):
+            _records.add_game(specs[0], specs[1], record["first"], 'X', record["winner"], history, think_times, game_index)
+        record.update(pair=pair_index, game=game_index, agent_a=specs[0], agent_b=specs[1])
+        records.append(record)
+    if _records is not None:
+        _records.flush()
+    return records
+
+def make_pairs(pair=None, round_robin=None):
+    pairs = [tuple(pair)] if pair else list(itertools.combinations(round_robin, 2))
+    for specs in pairs:
+        names = [parse_agent(spec)[0] for spec in specs]
+        if names == ["qlearning", "qlearning"]:
+            raise ValueError("qlearning cannot play itself: both sides would share one learning episode")
+    return pairs
+
+def make_tasks(pairs, games, workers, chunk_size=None, seed=0, done=None):
+    remaining = [[game for game in range(games) if not done or game not in done[pair_index]]
+                 for pair_index in range(len(pairs))]
+    if chunk_size is None:
+        chunk_size = max(1, -(-sum(map(len, remaining)) // (workers * CHUNKS_PER_WORKER)))
+    return [(pair_index, specs, seed, remaining[pair_index][start:start + chunk_size])
+            for pair_index, specs in enumerate(pairs)
+            for start in range(0, len(remaining[pair_index]), chunk_size)]
+
+def new_totals(specs):
+    return {"agents": list(specs), "games": 0, "wins": [0, 0], "draws": 0, "moves": 0,
+            "agent_moves": [0, 0], "move_time": [0.0, 0.0],
+            "game_moves": RunningStats(), "game_time": [RunningStats(), RunningStats()]}
+
+def add_record(totals, record):
+    totals["games"] += 1
+    totals["moves"] += record["moves"]
+    if record["winner"] is None:
+        totals["draws"] += 1
+    else:
+        totals["wins"][record["winner"]] += 1
+    first = record["first"]
+    totals["agent_moves"][first] += (record["moves"] + 1) // 2
+    totals["agent_moves"][1 - first] += record["moves"] // 2
+    totals["game_moves"].add(record["moves"])
+    for side, key in enumerate(("time_a", "time_b")):
+        totals["move_time"][side] += record[key]
+        totals["game_time"][side].add(record[key])
+
+def pair_summary(totals):
+    summary = dict(totals)
+    summary["game_moves"] = totals["game_moves"].summary()
+    summary["game_time"] = [stats.summary() for stats in totals["game_time"]]
+    return summary
+
+def resume_from_log(path, pairs, pair_totals):
+    done = [set() for _ in pairs]
+    for record in read_log(path):
+        pair_index = record["pair"]
+        if pair_index >= len(pairs) or [record["agent_a"], record["agent_b"]] != list(pairs[pair_index]):
+            raise ValueError(f"{path} was written for a different set of pairings")
+        if record["game"] not in done[pair_index]:
+            done[pair_index].add(record["game"])
+            add_record(pair_totals[pair_index], record)
+    return done
+
+# records are flushed before their chunk reaches the log, so the record file can be ahead of it
+def recorded_games(path, pairs):
+    records = GameRecords(path)
+    headers = records.headers
+    recorded = []
+    for agent_a, agent_b in pairs:
+        mine = (headers["agent_a"] == agent_id(agent_a)) & (headers["agent_b"] == agent_id(agent_b))
+        recorded.append(set(headers["game"][mine].tolist()))
+    return recorded
+
+def standings(pair_totals):
+    table = {}
+    for totals in pair_totals:
+        for side, spec in enumerate(totals["agents"]):
+            row = table.setdefault(spec, {"games": 0, "wins": 0, "losses": 0, "draws": 0})
+            row["games"] += totals["games"]
+            row["wins"] += totals["wins"][side]
+            row["losses"] += totals["wins"][1 - side]
+            row["draws"] += totals["draws"]
+    for row in table.values():
+        row["score"] = (row["wins"] + 0.5 * row["draws"]) / row["games"] if row["games"] else 0.0
+    return dict(sorted(table.items(), key=lambda item: -item[1]["score"]))
+
+def run_tournament(pairs, games, workers=None, chunk_size=None, seed=0, log_path=None, resume=False,
+                   records_path=None):
+    workers = workers or os.cpu_count() or 1
+    pair_totals = [new_totals(specs) for specs in pairs]
+    done = resume_from_log(log_path, pairs, pair_totals) if resume and log_path else None
+    resumed = sum(totals["games"] for totals in pair_totals)
+    qlearning.SAVE_FREQUENCY = 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for spec in {spec for specs in pairs for spec in specs}:
+            get_agent(spec)
+    tasks = make_tasks(pairs, games, workers, chunk_size, seed, done)
+    recorded = None
+    if records_path:
+        if not resume and os.path.exists(records_path):
+            os.remove(records_path)
+        GameRecordWriter(records_path).close()
+        if resume:
+            recorded = recorded_games(records_path, pairs)
+    log = ResultsLog(log_path, LOG_FIELDS, resume) if log_path else None
+    start = time.time()
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(records_path, recorded)) as pool:
+            for records in pool.imap_unordered(_play_chunk, tasks):
+                for record in records:
+                    add_record(pair_totals[record["pair"]], record)
+                    if log is not None:
+                        log.write(record)
+    finally:
+        if log is not None:
+            log.close()
+    elapsed = time.time() - start
+    total_games = sum(totals["games"] for totals in pair_totals)
+    played = total_games - resumed
+    return {
+        "pairs": [pair_summary(totals) for totals in pair_totals],
+        "standings": standings(pair_totals),
+        "games": total_games,
+        "played": played,
+        "resumed": resumed,
+        "workers": workers,
+        "chunks": len(tasks),
+        "elapsed": elapsed,
+        "games_per_second": played / elapsed if elapsed > 0 else 0.0
+    }
+
+def print_results(results):
+    if results["resumed"]:
+        print(f"[INFO] Resumed {results['resumed']} games from the results log")
+    print(f"[INFO] {results['played']} games in {results['elapsed']:.1f}s on {results['workers']} workers "
+          f"({results['games_per_second']:.1f} games/s, {results['chunks']} chunks)")
+    for totals in results["pairs"]:
+        first, second = totals["agents"]
+        ms_per_move = [1000 * t / n if n else 0.0 for t, n in zip(totals["move_time"], totals["agent_moves"])]
+        game_moves = totals["game_moves"]
+        print(f"{first} vs {second}: {totals['wins'][0]}-{totals['wins'][1]}-{totals['draws']} (W-L-D)  "
+              f"avg moves={game_moves['mean']:.1f}±{game_moves['std']:.1f}  "
+              f"ms/move={ms_per_move[0]:.2f}/{ms_per_move[1]:.2f}")
+    if len(results["pairs"]) > 1:
+        for spec, row in results["standings"].items():
+            print(f"{spec:>30}: score={row['score']:.3f}  {row['wins']}-{row['losses']}-{row['draws']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=f"Play headless {GAME_NAME} matches between agents in a process pool.",
+                                     epilog=f"Agents are name[:key=value,...], e.g. {AGENT_EXAMPLES}.")
+    matchup = parser.add_mutually_exclusive_group(required=True)
+    matchup.add_argument("--pair", nargs=2, metavar=("AGENT_A", "AGENT_B"))
+    matchup.add_argument("--round-robin", nargs="+", metavar="AGENT")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES, help="games per pairing")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="write aggregated results to this file")
+    parser.add_argument("--log", default=None, help="stream one row per game to this .csv or .jsonl file")
+    parser.add_argument("--resume", action="store_true", help="skip games already recorded in --log")
+    parser.add_argument("--records", default=None, help="append every game's moves and think times to this binary file")
+    args = parser.parse_args()
+    if args.resume and not args.log:
+        parser.error("--resume needs --log")
+    if args.round_robin is not None and len(args.round_robin) < 2:
+        parser.error("--round-robin needs at least two agents")
+    try:
+        pairs = make_pairs(args.pair, args.round_robin)
+    except ValueError as e:
+        parser.error(str(e))
+    results = run_tournament(pairs, args.games, args.workers, args.chunk_size, args.seed, args.log, args.resume,
+                             args.records)
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
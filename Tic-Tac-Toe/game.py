@@ -1,45 +1,86 @@
+from geometry import board_geometry
+
 class TicTacToe:
-    def __init__(self):
-        self.board = [' '] * 9
+    def __init__(self, rows=3, cols=3, k=None):
+        self.rows = rows
+        self.cols = cols
+        self.k = k if k is not None else min(rows, cols)
+        self.geometry = board_geometry(rows, cols, self.k)
+        self.masks = {'X': 0, 'O': 0}
         self.current_winner = None
+
+    @property
+    def board(self):
+        x_mask = self.masks['X']
+        o_mask = self.masks['O']
+        return ['X' if x_mask >> i & 1 else 'O' if o_mask >> i & 1 else ' ' for i in range(self.geometry.cells)]
+
+    @board.setter
+    def board(self, board):
+        self.masks = {
+            'X': sum(1 << i for i, spot in enumerate(board) if spot == 'X'),
+            'O': sum(1 << i for i, spot in enumerate(board) if spot == 'O')
+        }
+
     def print_board(self):
-        for row_idx in range(3):
-            row = self.board[row_idx * 3:(row_idx + 1) * 3]
-            indices = [str(i) for i in range(row_idx * 3, (row_idx + 1) * 3)]
+        board = self.board
+        width = len(str(self.geometry.cells - 1))
+        for row_idx in range(self.rows):
+            row = board[row_idx * self.cols:(row_idx + 1) * self.cols]
+            indices = [str(i).rjust(width) for i in range(row_idx * self.cols, (row_idx + 1) * self.cols)]
             print('| ' + ' | '.join(row) + ' |' + " <- " + ' '.join(indices))
         print()
 
+    def occupied_mask(self):
+        return self.masks['X'] | self.masks['O']
+
     def available_moves(self):
-        return [i for i, spot in enumerate(self.board) if spot == ' ']
+        return self.geometry.available(self.masks['X'] | self.masks['O'])
 
     def empty_squares(self):
-        return ' ' in self.board
+        return (self.masks['X'] | self.masks['O']) != self.geometry.full_mask
 
     def make_move(self, square, letter):
-        if self.board[square] == ' ':
-            self.board[square] = letter
-            if self.check_winner(square, letter):
-                self.current_winner = letter
-            return True
-        return False
+        bit = 1 << square
+        if (self.masks['X'] | self.masks['O']) & bit:
+            return False
+        self.masks[letter] |= bit
+        if self.check_winner(square, letter):
+            self.current_winner = letter
+        return True
+
+    def undo_move(self, square):
+        bit = 1 << square
+        if self.masks['X'] & bit:
+            self.masks['X'] ^= bit
+        elif self.masks['O'] & bit:
+            self.masks['O'] ^= bit
+        else:
+            return False
+        self.current_winner = None
+        return True
 
     def check_winner(self, square, letter):
-        row_idx = square // 3
-        row = self.board[row_idx * 3:(row_idx + 1) * 3]
-        if all(spot == letter for spot in row):
-            return True
-        
-        col_idx = square % 3
-        column = [self.board[col_idx + i * 3] for i in range(3)]
-        if all(spot == letter for spot in column):
-            return True
-        
-        if square % 2 == 0:
-            diagonal1 = [self.board[i] for i in [0, 4, 8]]
-            if all(spot == letter for spot in diagonal1):
-                return True
-            diagonal2 = [self.board[i] for i in [2, 4, 6]]
-            if all(spot == letter for spot in diagonal2):
+        mask = self.masks[letter]
+        for line_mask in self.geometry.cell_line_masks[square]:
+            if mask & line_mask == line_mask:
                 return True
-        
-        return False
\ No newline at end of file
+        return False
+
+    def threats(self, letter):
+        own = self.masks[letter]
+        opponent = self.masks['O' if letter == 'X' else 'X']
+        cells = 0
+        for line_mask in self.geometry.line_masks:
+            if line_mask & opponent:
+                continue
+            missing = line_mask & ~own
+            if missing and not missing & (missing - 1):
+                cells |= missing
+        return cells
+
+    def winning_moves(self, letter):
+        cells = self.threats(letter)
+        if not cells:
+            return []
+        return self.geometry.available(self.geometry.full_mask ^ cells)
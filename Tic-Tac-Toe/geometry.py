@@ -0,0 +1,52 @@
+LINE_DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+_geometries = {}
+
+def line_scores(k):
+    return tuple(10 ** (count - 2) if count >= 2 else 0 for count in range(k + 1))
+
+class BoardGeometry:
+    def __init__(self, rows, cols, k):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.cells = rows * cols
+        self.full_mask = (1 << self.cells) - 1
+        lines = []
+        for row in range(rows):
+            for col in range(cols):
+                for d_row, d_col in LINE_DIRECTIONS:
+                    end_row = row + (k - 1) * d_row
+                    end_col = col + (k - 1) * d_col
+                    if 0 <= end_row < rows and 0 <= end_col < cols:
+                        lines.append(tuple((row + i * d_row) * cols + col + i * d_col for i in range(k)))
+        self.lines = tuple(lines)
+        self.line_starts = tuple(line[0] for line in lines)
+        self.line_masks = tuple(sum(1 << cell for cell in line) for line in lines)
+        cell_lines = [[] for _ in range(self.cells)]
+        for index, line in enumerate(lines):
+            for cell in line:
+                cell_lines[cell].append(index)
+        self.cell_lines = tuple(tuple(indices) for indices in cell_lines)
+        self.cell_line_masks = tuple(tuple(self.line_masks[index] for index in indices) for indices in cell_lines)
+        self.line_scores = line_scores(k)
+        self.free_squares = None
+        if self.cells <= 12:
+            self.free_squares = tuple(tuple(cell for cell in range(self.cells) if not occupied >> cell & 1)
+                                      for occupied in range(1 << self.cells))
+
+    def available(self, occupied):
+        if self.free_squares is not None:
+            return list(self.free_squares[occupied])
+        free = self.full_mask & ~occupied
+        return [cell for cell in range(self.cells) if free >> cell & 1]
+
+    def center(self):
+        return (self.rows // 2) * self.cols + self.cols // 2
+
+def board_geometry(rows, cols, k):
+    geometry = _geometries.get((rows, cols, k))
+    if geometry is None:
+        geometry = BoardGeometry(rows, cols, k)
+        _geometries[(rows, cols, k)] = geometry
+    return geometry
@@ -1,12 +1,13 @@
 import random
 import os
-import csv
 import time
 from datetime import datetime
 import matplotlib.pyplot as plt
 
 from game import TicTacToe
 from algorithms import minimax, qlearning, baseline
+from algorithms.game_records import GameRecordWriter
+from algorithms.results_log import ResultsLog, RunningStats, read_log
 
 def select_alpha_beta():
     response = input("Use alpha-beta pruning for minimax? (y/n): ").strip().lower()
@@ -30,7 +31,7 @@ def get_move(game, player_letter, algorithm, use_alpha_beta, time_limit=30):
     elapsed_time = time.time() - start_time
     return move, elapsed_time
 
-def play_game_matchup(matchup, use_alpha_beta):
+def play_game_matchup(matchup, use_alpha_beta, history=None):
     game = TicTacToe()
     if matchup == "1":
         algo1, algo2 = "baseline", "minimax"
@@ -61,6 +62,8 @@ def play_game_matchup(matchup, use_alpha_beta):
             algo1_moves += 1
             
             game.make_move(move, player1_letter)
+            if history is not None:
+                history.append((0, move, move_time))
             if game.current_winner == player1_letter:
                 if algo1 == "qlearning": qlearning.update_terminal(10)
                 if algo2 == "qlearning": qlearning.update_terminal(-10)
@@ -76,6 +79,8 @@ def play_game_matchup(matchup, use_alpha_beta):
             algo2_moves += 1
             
             game.make_move(move, player2_letter)
+            if history is not None:
+                history.append((1, move, move_time))
             if game.current_winner == player2_letter:
                 if algo2 == "qlearning": qlearning.update_terminal(10)
                 if algo1 == "qlearning": qlearning.update_terminal(-10)
@@ -137,34 +142,26 @@ def play_user_vs_ai(ai_type="minimax", use_alpha_beta=True):
 
     print("\nIt's a tie!")
 
-def save_results(results, parameters, algo1_times, algo2_times, moves_per_game, folder_prefix="tictactoe_results"):
+def results_folder(folder_prefix="tictactoe_results"):
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
     folder_name = f"{folder_prefix}_{now}"
     os.makedirs(folder_name, exist_ok=True)
+    return folder_name
 
-    avg_algo1_time = sum(algo1_times) / len(algo1_times) if algo1_times else 0
-    avg_algo2_time = sum(algo2_times) / len(algo2_times) if algo2_times else 0
-    avg_moves = sum(moves_per_game) / len(moves_per_game) if moves_per_game else 0
-    
-    csv_file = os.path.join(folder_name, "results.csv")
-    with open(csv_file, mode='w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "Game Number", 
-            "Winner", 
-            f"{parameters['player1_algo']} Score", 
-            f"{parameters['player2_algo']} Score",
-            f"{parameters['player1_algo']} Avg Time (s)",
-            f"{parameters['player2_algo']} Avg Time (s)",
-            "Moves Count"
-        ])
-        for i, row in enumerate(results):
-            writer.writerow(row + [algo1_times[i], algo2_times[i], moves_per_game[i]])
-    print(f"CSV results saved to {csv_file}")
+def game_log_fields(player1_algo, player2_algo):
+    return ["Game Number", "Winner", f"{player1_algo} Score", f"{player2_algo} Score",
+            f"{player1_algo} Avg Time (s)", f"{player2_algo} Avg Time (s)", "Moves Count"]
+
+def save_results(folder_name, parameters, algo1_times, algo2_times, moves_per_game):
+    avg_algo1_time = algo1_times.mean
+    avg_algo2_time = algo2_times.mean
+    avg_moves = moves_per_game.mean
     
-    games = range(1, len(results) + 1)
-    algo1_scores = [row[2] for row in results]
-    algo2_scores = [row[3] for row in results]
+    fields = game_log_fields(parameters['player1_algo'], parameters['player2_algo'])
+    rows = list(read_log(os.path.join(folder_name, "results.csv")))
+    games = [row[fields[0]] for row in rows]
+    algo1_scores = [row[fields[2]] for row in rows]
+    algo2_scores = [row[fields[3]] for row in rows]
     
     plt.figure(figsize=(10, 6))
     plt.plot(games, algo1_scores, label=f"{parameters['player1_algo']} Score")
@@ -207,9 +204,11 @@ def save_results(results, parameters, algo1_times, algo2_times, moves_per_game,
             pf.write(f"{key}: {value}\n")
         
         pf.write("\nStatistics:\n")
-        pf.write(f"Average moves per game: {avg_moves:.2f}\n")
-        pf.write(f"Average {parameters['player1_algo']} move time: {avg_algo1_time:.6f} seconds\n")
-        pf.write(f"Average {parameters['player2_algo']} move time: {avg_algo2_time:.6f} seconds\n")
+        pf.write(f"Average moves per game: {avg_moves:.2f} (std {moves_per_game.std():.2f})\n")
+        pf.write(f"Average {parameters['player1_algo']} move time: {avg_algo1_time:.6f} seconds "
+                 f"(std {algo1_times.std():.6f})\n")
+        pf.write(f"Average {parameters['player2_algo']} move time: {avg_algo2_time:.6f} seconds "
+                 f"(std {algo2_times.std():.6f})\n")
         
     print(f"Parameters and statistics saved to {params_file}")
 
@@ -257,10 +256,9 @@ def main():
         else:
             player1_algo, player2_algo = "baseline", "minimax"
 
-        results = []
-        algo1_times = []
-        algo2_times = []
-        moves_per_game = []
+        algo1_times = RunningStats()
+        algo2_times = RunningStats()
+        moves_per_game = RunningStats()
         score1, score2 = 0, 0
         
         params = {
@@ -274,37 +272,47 @@ def main():
             "player2_algo": player2_algo
         }
 
+        folder_name = results_folder()
+        games_log = ResultsLog(os.path.join(folder_name, "results.csv"), game_log_fields(player1_algo, player2_algo))
+        game_records = GameRecordWriter(os.path.join(folder_name, "games.rec"))
         start_time = time.time()
         print("\nRunning games...")
-        for i in range(total_games):
-            winner, algo1, algo2, algo1_time, algo2_time, moves_count = play_game_matchup(choice, use_alpha_beta)
-        
-            algo1_times.append(algo1_time)
-            algo2_times.append(algo2_time)
-            moves_per_game.append(moves_count)
+        with games_log, game_records:
+            for i in range(total_games):
+                history = []
+                winner, algo1, algo2, algo1_time, algo2_time, moves_count = play_game_matchup(choice, use_alpha_beta,
+                                                                                              history=history)
             
-            if winner == "player1": 
-                score1 += 1
-            elif winner == "player2": 
-                score2 += 1
+                algo1_times.add(algo1_time)
+                algo2_times.add(algo2_time)
+                moves_per_game.add(moves_count)
                 
-            results.append([i+1, winner, score1, score2])
-            
-            print(f"Game {i+1}: Winner = {winner} | {player1_algo}: {score1} - {player2_algo}: {score2}")
-            print(f"  {player1_algo} avg time: {algo1_time:.6f}s | {player2_algo} avg time: {algo2_time:.6f}s | Moves: {moves_count}")
+                if winner == "player1": 
+                    score1 += 1
+                elif winner == "player2": 
+                    score2 += 1
+                    
+                games_log.write(dict(zip(games_log.fields, [i+1, winner, score1, score2,
+                                                            algo1_time, algo2_time, moves_count])))
+                first = history[0][0]
+                game_winner = 0 if winner == "player1" else 1 if winner == "player2" else None
+                game_records.add_game(player1_algo, player2_algo, first, 'XO'[first], game_winner,
+                                      [move for _, move, _ in history], [seconds for _, _, seconds in history], i)
+                
+                print(f"Game {i+1}: Winner = {winner} | {player1_algo}: {score1} - {player2_algo}: {score2}")
+                print(f"  {player1_algo} avg time: {algo1_time:.6f}s | {player2_algo} avg time: {algo2_time:.6f}s | Moves: {moves_count}")
+        print(f"CSV results saved to {games_log.path}")
+        print(f"Game records saved to {game_records.path}")
 
         elapsed_time = time.time() - start_time
         print(f"\nFinal Score: {player1_algo} = {score1}, {player2_algo} = {score2}")
         print(f"Total execution time: {elapsed_time:.2f} seconds")
-        avg_algo1_time = sum(algo1_times) / len(algo1_times) if algo1_times else 0
-        avg_algo2_time = sum(algo2_times) / len(algo2_times) if algo2_times else 0
-        avg_moves = sum(moves_per_game) / len(moves_per_game) if moves_per_game else 0
         
         print(f"\nOverall Statistics:")
-        print(f"Average moves per game: {avg_moves:.2f}")
-        print(f"Average {player1_algo} move time: {avg_algo1_time:.6f} seconds")
-        print(f"Average {player2_algo} move time: {avg_algo2_time:.6f} seconds")
-        save_results(results, params, algo1_times, algo2_times, moves_per_game, folder_prefix="tictactoe_results")
+        print(f"Average moves per game: {moves_per_game.mean:.2f}")
+        print(f"Average {player1_algo} move time: {algo1_times.mean:.6f} seconds")
+        print(f"Average {player2_algo} move time: {algo2_times.mean:.6f} seconds")
+        save_results(folder_name, params, algo1_times, algo2_times, moves_per_game)
         
         qlearning.save_model()
         print("\nSession complete.\n")